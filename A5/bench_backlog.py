@@ -0,0 +1,76 @@
+from collections import deque
+import argparse
+import importlib.util
+import os
+import time
+
+from rdt import Msg, Pkt, Simulator, default_options, pkt_insert_checksum
+
+# Time a sender's queue and window handling with a deep backlog: hand A
+# num_msgs messages at once, then ack its packets one by one, oldest first,
+# until the backlog is gone.  The event loop never runs, so only the
+# sender's own work is timed.  Takes the protocol files to compare, so an
+# older copy can be timed too, e.g.
+#
+#   git show HEAD~1:A5/goBackN.py > /tmp/goBackN_old.py
+#   python bench_backlog.py goBackN.py /tmp/goBackN_old.py
+
+def load_protocol(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def drain_backlog(module, num_msgs, seqnum_limit):
+    # Returns the time to queue the messages and the time to ack them all.
+    options = default_options(num_msgs=num_msgs, seqnum_limit=seqnum_limit)
+    sim = Simulator(options, module.EntityA, module.EntityB)
+    entity_A = sim.entity_A
+    # Seqnums of the packets A sent, to be acked in order.
+    in_flight = deque()
+    to_layer3 = sim.to_layer3
+    def record_send(entity, packet):
+        in_flight.append(packet.seqnum)
+        to_layer3(entity, packet)
+    sim.to_layer3 = record_send
+
+    msgs = [Msg(bytes([97 + i % 26]) * sim.msg_size) for i in range(num_msgs)]
+    start = time.perf_counter()
+    for m in msgs:
+        entity_A.output(m)
+    queued = time.perf_counter()
+    n_acked = 0
+    while in_flight:
+        ack = Pkt(0, in_flight.popleft(), 0, b'')
+        pkt_insert_checksum(sim.entity_B, ack)
+        entity_A.input(ack)
+        n_acked += 1
+    drained = time.perf_counter()
+    return queued - start, drained - queued, n_acked
+
+if __name__ == '__main__':
+    desc = 'Medir el coste de la cola y la ventana de A con muchos mensajes pendientes.'
+    parser = argparse.ArgumentParser(description=desc)
+    parser.add_argument('protocols', nargs='*',
+                        default=['goBackN.py', 'alternatingBitProtocol.py',
+                                 'selectiveRepeat.py'],
+                        help=('ficheros de protocolo a medir'
+                              ' [por defecto: %(default)s]'))
+    parser.add_argument('-n', type=int, default=100000,
+                        dest='num_msgs',
+                        help=('número de mensajes en la cola de A'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-z', type=int, default=64,
+                        dest='seqnum_limit',
+                        help=('límite de seqnum'
+                              ' [int, por defecto: %(default)s]'))
+    options = parser.parse_args()
+
+    print(f'{"protocolo":>32} {"encolar (s)":>12} {"vaciar (s)":>11}'
+          f' {"acks":>8} {"µs/ack":>8}')
+    for path in options.protocols:
+        queue_time, drain_time, n_acked = drain_backlog(
+            load_protocol(path), options.num_msgs, options.seqnum_limit)
+        print(f'{path:>32} {queue_time:>12.2f} {drain_time:>11.2f}'
+              f' {n_acked:>8} {drain_time / max(n_acked, 1) * 1e6:>8.2f}')
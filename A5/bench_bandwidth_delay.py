@@ -0,0 +1,37 @@
+import argparse
+
+from rdt import Pkt, make_arg_parser, run_protocol
+import goBackN
+
+# Go-Back-N throughput against window size on a link with a given bandwidth
+# and propagation delay.  The window only fills the link once it covers the
+# bandwidth-delay product.
+
+if __name__ == '__main__':
+    desc = 'Throughput de Go-Back-N según el tamaño de ventana en un enlace con ancho de banda y retardo.'
+    # The simulator's options, with -z taking a list of seqnum limits.
+    parser = argparse.ArgumentParser(description=desc,
+                                     parents=[make_arg_parser(add_help=False)],
+                                     conflict_handler='resolve')
+    parser.set_defaults(num_msgs=3000, interarrival_time=1.0, random_seed=1,
+                        bandwidth=32.0, prop_delay=10.0, rto='adaptive')
+    parser.add_argument('-z', type=int, nargs='+', default=[4, 8, 16, 32, 64, 128],
+                        dest='seqnum_limits',
+                        help=('límites de seqnum; la ventana es la mitad'
+                              ' [int, por defecto: %(default)s]'))
+    options = parser.parse_args()
+
+    # Round trip of a data packet and its ack, in data packets.
+    pkt_time = (Pkt.HEADER_SIZE + options.msg_size) / options.bandwidth
+    bdp = (2*options.prop_delay + 2*pkt_time) / pkt_time
+    print(f'producto ancho de banda-retardo: {bdp:.1f} paquetes')
+    print(f'{"ventana":>8} {"n_to_layer3_A":>14} {"n_to_layer5_B":>14}'
+          f' {"n_dropped":>10} {"max_queue":>10} {"bytes/tiempo":>13}'
+          f' {"latencia p50":>13}')
+    for seqnum_limit in options.seqnum_limits:
+        stats = run_protocol(goBackN, options, seqnum_limit=seqnum_limit).get_stats()
+        p50 = stats['latency_p50'] or 0.0
+        print(f'{seqnum_limit//2:>8} {stats["n_to_layer3_A"]:>14}'
+              f' {stats["n_to_layer5_B"]:>14} {stats["n_dropped"]:>10}'
+              f' {stats["max_queue"]:>10} {stats["bytes_throughput"]:>13.3f}'
+              f' {p50:>13.3f}')
@@ -0,0 +1,44 @@
+import argparse
+
+from rdt import make_arg_parser, run_protocol
+from rdt.impairment import GilbertElliottImpairment
+import alternatingBitProtocol
+import goBackN
+import selectiveRepeat
+
+# Compare each protocol under Gilbert-Elliott bursty loss and under
+# independent loss with the same mean loss probability and seed.
+
+PROTOCOLS = [('alternatingBitProtocol', alternatingBitProtocol),
+             ('goBackN', goBackN),
+             ('selectiveRepeat', selectiveRepeat)]
+
+if __name__ == '__main__':
+    desc = 'Comparar pérdidas en ráfagas (Gilbert-Elliott) e independientes con la misma pérdida media.'
+    # The simulator's options, with --ge-r taking a list of values.
+    parser = argparse.ArgumentParser(description=desc,
+                                     parents=[make_arg_parser(add_help=False)],
+                                     conflict_handler='resolve')
+    parser.set_defaults(num_msgs=3000, interarrival_time=20.0, random_seed=1,
+                        ge_p=0.03)
+    parser.add_argument('--ge-r', type=float, nargs='+', default=[0.1, 0.3, 0.9],
+                        dest='ge_r_values',
+                        help=('probabilidades de volver al estado bueno; la'
+                              ' ráfaga media es 1/r paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    options = parser.parse_args()
+
+    print(f'{"ráfaga":>7} {"pérdida":>8} {"protocolo":>24} {"modelo":>10}'
+          f' {"n_to_layer3_A":>14} {"n_to_layer5_B":>14} {"throughput":>11}')
+    for ge_r in options.ge_r_values:
+        loss_prob = GilbertElliottImpairment(options.ge_p, ge_r, 0.0, 1.0,
+                                             0.0, 0.0, None, None).mean_loss_prob()
+        for name, module in PROTOCOLS:
+            for model, overrides in (('bernoulli', dict(loss_prob=loss_prob)),
+                                     ('gilbert', dict(loss_model='gilbert',
+                                                      ge_p=options.ge_p,
+                                                      ge_r=ge_r))):
+                stats = run_protocol(module, options, **overrides).get_stats()
+                print(f'{1/ge_r:>7.1f} {loss_prob:>8.4f} {name:>24} {model:>10}'
+                      f' {stats["n_to_layer3_A"]:>14} {stats["n_to_layer5_B"]:>14}'
+                      f' {stats["throughput"]:>11.5f}')
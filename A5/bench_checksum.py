@@ -0,0 +1,60 @@
+import argparse
+from binascii import crc32
+import time
+
+from rdt import Pkt
+from rdt import packet
+
+# Per-packet cost of the checksums, each packet with its own payload, as in
+# a run.  'referencia' is the checksum as computed before the header was
+# packed at once.
+
+def reference_checksum(p):
+    crc = 0
+    crc = crc32(p.seqnum.to_bytes(4, byteorder='big'), crc)
+    crc = crc32(p.acknum.to_bytes(4, byteorder='big'), crc)
+    crc = crc32(p.payload, crc)
+    return crc
+
+def make_packets(n, size):
+    return [Pkt(i % 16, i % 16, 0, i.to_bytes(4, 'big').rjust(size, b'a'))
+            for i in range(n)]
+
+def ns_per_packet(f, packets, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for p in packets:
+            f(p)
+        best = min(best, time.perf_counter() - start)
+    return best / len(packets) * 1e9
+
+if __name__ == '__main__':
+    desc = 'Medir el coste por paquete de las sumas de comprobación.'
+    parser = argparse.ArgumentParser(description=desc)
+    parser.add_argument('-n', type=int, default=20000,
+                        dest='n_packets',
+                        help=('número de paquetes por medida'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 200, 1000],
+                        dest='sizes',
+                        help=('tamaños de payload en bytes'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-r', type=int, default=5,
+                        dest='repeat',
+                        help=('repeticiones de cada medida (se toma la mejor)'
+                              ' [int, por defecto: %(default)s]'))
+    options = parser.parse_args()
+
+    print(f'{"payload":>8} {"suma":>10} {"ns/paquete":>11}')
+    for size in options.sizes:
+        packets = make_packets(options.n_packets, size)
+        rows = [('referencia', ns_per_packet(reference_checksum, packets,
+                                             options.repeat))]
+        for name, checksum in packet.CHECKSUMS.items():
+            rows.append((name,
+                         ns_per_packet(lambda p: checksum(p.seqnum, p.acknum,
+                                                          p.payload),
+                                       packets, options.repeat)))
+        for name, ns in rows:
+            print(f'{size:>8} {name:>10} {ns:>11.0f}')
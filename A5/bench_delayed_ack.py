@@ -0,0 +1,30 @@
+import argparse
+
+from rdt import make_arg_parser, run_protocol
+import goBackN
+
+# Compare immediate and delayed/cumulative acks in the Go-Back-N receiver,
+# with the same seed at each point.
+
+if __name__ == '__main__':
+    desc = 'Comparar acks inmediatos y retrasados en el receptor de Go-Back-N.'
+    # The simulator's options, with --ack-every taking a list of values.
+    parser = argparse.ArgumentParser(description=desc,
+                                     parents=[make_arg_parser(add_help=False)],
+                                     conflict_handler='resolve')
+    parser.set_defaults(num_msgs=3000, interarrival_time=20.0, random_seed=1)
+    parser.add_argument('--ack-every', type=int, nargs='+', default=[1, 2, 4, 8],
+                        dest='ack_every_values',
+                        help=('valores de --ack-every a comparar'
+                              ' [int, por defecto: %(default)s]'))
+    options = parser.parse_args()
+
+    print(f'{"ack_every":>9} {"n_to_layer3_B":>14} {"n_to_layer5_B":>14}'
+          f' {"throughput":>11} {"latencia p50":>13} {"latencia p95":>13}')
+    for ack_every in options.ack_every_values:
+        stats = run_protocol(goBackN, options, ack_every=ack_every).get_stats()
+        p50 = stats['latency_p50'] or 0.0
+        p95 = stats['latency_p95'] or 0.0
+        print(f'{ack_every:>9} {stats["n_to_layer3_B"]:>14}'
+              f' {stats["n_to_layer5_B"]:>14} {stats["throughput"]:>11.5f}'
+              f' {p50:>13.3f} {p95:>13.3f}')
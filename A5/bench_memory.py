@@ -0,0 +1,74 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Run one or more simulator scripts with the same arguments, each in its own
+# process, and report the peak RSS and wall time of every run.  Useful to
+# compare a simulator against an older copy of itself, e.g.
+#
+#   git show HEAD~1:A5/goBackN.py > /tmp/goBackN_old.py
+#   python bench_memory.py goBackN.py /tmp/goBackN_old.py
+#
+# Scripts outside A5/ import the rdt package from A5/.
+
+A5_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def run_script(script, sim_args):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [A5_DIR] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []))
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, script] + sim_args,
+                            stdout=subprocess.DEVNULL, env=env)
+    _, status, rusage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError(f'{script} exited with status {proc.returncode}')
+    # ru_maxrss is in kilobytes on Linux.
+    return rusage.ru_maxrss, elapsed
+
+if __name__ == '__main__':
+    desc = 'Medir el pico de memoria (RSS) de una simulación de protocolo.'
+    parser = argparse.ArgumentParser(description=desc)
+    parser.add_argument('scripts', nargs='*', default=['goBackN.py'],
+                        help=('scripts de simulación a medir'
+                              ' [por defecto: %(default)s]'))
+    parser.add_argument('-n', type=int, default=1000000,
+                        dest='num_msgs',
+                        help=('número de mensajes a simular'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-d', type=float, default=5.0,
+                        dest='interarrival_time',
+                        help=('tiempo promedio entre mensajes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-z', type=int, default=16,
+                        dest='seqnum_limit',
+                        help=('límite de seqnum'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-l', type=float, default=0.1,
+                        dest='loss_prob',
+                        help=('probabilidad de pérdida de paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-c', type=float, default=0.1,
+                        dest='corrupt_prob',
+                        help=('probabilidad de corrupción de paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-s', type=int, default=1,
+                        dest='random_seed',
+                        help=('semilla para el generador de números aleatorios'
+                              ' [int, por defecto: %(default)s]'))
+    options = parser.parse_args()
+
+    sim_args = ['-n', str(options.num_msgs),
+                '-d', str(options.interarrival_time),
+                '-z', str(options.seqnum_limit),
+                '-l', str(options.loss_prob),
+                '-c', str(options.corrupt_prob),
+                '-s', str(options.random_seed)]
+    print(f'argumentos: {" ".join(sim_args)}')
+    for script in options.scripts:
+        rss_kb, elapsed = run_script(script, sim_args)
+        print(f'{script}: pico RSS {rss_kb/1024:.1f} MiB, {elapsed:.1f} s')
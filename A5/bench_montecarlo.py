@@ -0,0 +1,74 @@
+import argparse
+import importlib
+import time
+
+from rdt import run_protocol
+from rdt.metrics import mean_confidence_interval
+from rdt.montecarlo import run_replicas
+
+# Compare the vectorized Monte Carlo estimates with the same number of
+# Simulator runs over consecutive seeds, in results and in time.
+
+FIELDS = ('throughput', 'n_retransmit_A', 'n_to_layer5_B')
+
+def run_seeds(protocol, n_runs, **overrides):
+    module = importlib.import_module(protocol)
+    runs = {name: [] for name in FIELDS}
+    for seed in range(1, n_runs+1):
+        stats = run_protocol(module, random_seed=seed, **overrides).get_stats()
+        for name in FIELDS:
+            runs[name].append(stats[name])
+    return runs
+
+if __name__ == '__main__':
+    desc = 'Comparar la estimación Monte Carlo vectorizada con ejecuciones del simulador.'
+    parser = argparse.ArgumentParser(description=desc)
+    parser.add_argument('-p', nargs='+', default=['alternatingBitProtocol', 'goBackN'],
+                        dest='protocols',
+                        help='protocolos [por defecto: %(default)s]')
+    parser.add_argument('-r', type=int, default=200,
+                        dest='n_replicas',
+                        help=('número de réplicas y de ejecuciones'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-n', type=int, default=500,
+                        dest='num_msgs',
+                        help=('número de mensajes por réplica'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-d', type=float, default=20.0,
+                        dest='interarrival_time',
+                        help=('tiempo promedio entre mensajes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-z', type=int, default=16,
+                        dest='seqnum_limit',
+                        help=('límite de seqnum'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-l', type=float, default=0.1,
+                        dest='loss_prob',
+                        help=('probabilidad de pérdida de paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-c', type=float, default=0.05,
+                        dest='corrupt_prob',
+                        help=('probabilidad de corrupción de paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    options = parser.parse_args()
+
+    params = dict(num_msgs=options.num_msgs,
+                  interarrival_time=options.interarrival_time,
+                  seqnum_limit=options.seqnum_limit,
+                  loss_prob=options.loss_prob,
+                  corrupt_prob=options.corrupt_prob)
+    print(f'{"protocolo":>24} {"método":>12} {"tiempo (s)":>11}'
+          + ''.join(f' {name:>24}' for name in FIELDS))
+    for protocol in options.protocols:
+        for method in ('simulador', 'montecarlo'):
+            start = time.perf_counter()
+            if method == 'simulador':
+                runs = run_seeds(protocol, options.n_replicas, **params)
+            else:
+                runs = run_replicas(protocol, options.n_replicas, seed=1, **params)
+            elapsed = time.perf_counter() - start
+            cells = ''
+            for name in FIELDS:
+                mean, half_width = mean_confidence_interval(runs[name])
+                cells += f' {f"{mean:.5g} ± {half_width:.2g}":>24}'
+            print(f'{protocol:>24} {method:>12} {elapsed:>11.2f}{cells}')
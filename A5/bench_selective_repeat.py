@@ -0,0 +1,32 @@
+import argparse
+
+from rdt import make_arg_parser, run_protocol
+import goBackN
+import selectiveRepeat
+
+# Compare Go-Back-N and Selective Repeat over a range of loss rates, with the
+# same seed for both protocols at each point.
+
+PROTOCOLS = [('goBackN', goBackN), ('selectiveRepeat', selectiveRepeat)]
+
+if __name__ == '__main__':
+    desc = 'Comparar Go-Back-N y Selective Repeat para varias probabilidades de pérdida.'
+    # The simulator's options, with -l taking a list of loss rates.
+    parser = argparse.ArgumentParser(description=desc,
+                                     parents=[make_arg_parser(add_help=False)],
+                                     conflict_handler='resolve')
+    parser.set_defaults(num_msgs=3000, interarrival_time=20.0, random_seed=1)
+    parser.add_argument('-l', type=float, nargs='+',
+                        default=[0.0, 0.05, 0.1, 0.2, 0.3, 0.4],
+                        dest='loss_probs',
+                        help=('probabilidades de pérdida de paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    options = parser.parse_args()
+
+    print(f'{"pérdida":>8} {"protocolo":>16} {"n_to_layer3_A":>14}'
+          f' {"n_to_layer5_B":>14} {"throughput":>11}')
+    for loss_prob in options.loss_probs:
+        for name, module in PROTOCOLS:
+            stats = run_protocol(module, options, loss_prob=loss_prob).get_stats()
+            print(f'{loss_prob:>8} {name:>16} {stats["n_to_layer3_A"]:>14}'
+                  f' {stats["n_to_layer5_B"]:>14} {stats["throughput"]:>11.5f}')
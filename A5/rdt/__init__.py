@@ -0,0 +1,7 @@
+from .packet import Msg, Pkt, pkt_compute_checksum, pkt_insert_checksum, pkt_is_corrupt
+from .engine import (EventType, Event, Simulator,
+                     start_timer, stop_timer, to_layer3, to_layer5, get_time,
+                     record_cwnd)
+from .cli import (make_arg_parser, default_options, run_protocol,
+                  report_config, report_results)
+from .rto import FixedTimeout, RttEstimator, make_rtt_estimator
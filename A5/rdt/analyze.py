@@ -0,0 +1,219 @@
+import argparse
+import csv
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import tracelog
+
+# Offline analysis of the traces written with --trace-file, without running
+# the simulation again, e.g. from A5/:
+#
+#   python goBackN.py -n 100000 -l 0.1 --trace-file gbn.trace
+#   python -m rdt.analyze gbn.trace --tsd gbn_tsd.csv --series gbn_tput.csv
+#
+# A binary trace is memory-mapped as a NumPy record array, so only the
+# pages the analysis touches are read and the records never become Python
+# objects.  JSONL traces are parsed into the same kind of array.
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('rdt.analyze needs NumPy (pip install numpy)')
+
+def record_dtype():
+    # The layout of tracelog.RECORD.
+    return np.dtype([('time', '<f8'), ('kind', 'u1'), ('entity', 'u1'),
+                     ('flags', 'u1'), ('flow', 'u1'),
+                     ('seqnum', '<i4'), ('acknum', '<i4')])
+
+def load_trace(path):
+    _require_numpy()
+    dtype = record_dtype()
+    with open(path, 'rb') as f:
+        is_binary = f.read(len(tracelog.MAGIC)) == tracelog.MAGIC
+    if not is_binary:
+        return np.array(list(tracelog.read_records(path)), dtype=dtype)
+    # A truncated last record is left out, as read_records does.
+    n = (os.path.getsize(path) - len(tracelog.MAGIC)) // dtype.itemsize
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r',
+                     offset=len(tracelog.MAGIC), shape=(n,))
+
+def packet_numbers(records):
+    # Unwraps the sequence numbers of the to_layer3 records: returns the
+    # to_layer3 records, the number of the data packet each one carries
+    # (A's sends) or acknowledges (B's sends) counting from 0 per flow, and
+    # which of A's sends are retransmissions.
+    #
+    # The trace does not say which sends are retransmissions.  Every sender
+    # hands out sequence numbers in order, so a send by A is new if its
+    # seqnum follows the newest one it sent, modulo the seqnum limit, which
+    # is taken to be the largest seqnum in the trace plus one.
+    sends = records[records['kind'] == tracelog.TO_LAYER3]
+    numbers = np.zeros(len(sends), dtype=np.int64)
+    resent = np.zeros(len(sends), dtype=bool)
+    if len(sends) == 0:
+        return sends, numbers, resent
+    from_A = sends['entity'] == 0
+    limit = int(sends['seqnum'][from_A].max(initial=0)) + 1
+    next_new = {}           # flow -> seqnum of A's next new packet.
+    n_new = {}              # flow -> number of new packets A sent.
+    nums = np.where(from_A, sends['seqnum'], sends['acknum']).tolist()
+    for i, (entity, flow, s) in enumerate(zip(sends['entity'].tolist(),
+                                              sends['flow'].tolist(), nums)):
+        n = n_new.get(flow, 0)
+        expected = next_new.get(flow, s if entity == 0 else 0)
+        if entity == 0 and s == expected:
+            numbers[i] = n
+            n_new[flow] = n + 1
+            next_new[flow] = (s + 1) % limit
+        else:
+            numbers[i] = n - (expected - s) % limit
+            resent[i] = entity == 0
+    return sends, numbers, resent
+
+def bucket_counts(times, width, n_buckets):
+    return np.bincount((times // width).astype(np.int64), minlength=n_buckets)
+
+def analyze(records, bucket_width, flow=None):
+    # Summary of a trace, with the per-bucket series and the unwrapped
+    # to_layer3 records for the time-sequence diagram.
+    if flow is not None:
+        records = records[records['flow'] == flow]
+    sends, numbers, resent = packet_numbers(records)
+    from_A = sends['entity'] == 0
+    lost = (sends['flags'] & tracelog.LOST) != 0
+    corrupt = (sends['flags'] & tracelog.CORRUPT) != 0
+    delivered = records[(records['kind'] == tracelog.TO_LAYER5)
+                        & (records['entity'] == 1)]
+    duration = float(records['time'].max(initial=0.0))
+    n_buckets = int(duration // bucket_width) + 1
+    delivered_per_bucket = bucket_counts(delivered['time'], bucket_width,
+                                         n_buckets)
+    sent_per_bucket = bucket_counts(sends['time'][from_A], bucket_width,
+                                    n_buckets)
+    resent_per_bucket = bucket_counts(sends['time'][resent], bucket_width,
+                                      n_buckets)
+    lost_per_bucket = bucket_counts(sends['time'][lost], bucket_width,
+                                    n_buckets)
+    return {'n_records'           : len(records),
+            'n_flows'             : len(np.unique(records['flow'])),
+            'time'                : duration,
+            'n_to_layer3_A'       : int(from_A.sum()),
+            'n_to_layer3_B'       : int((~from_A).sum()),
+            'n_lost'              : int(lost.sum()),
+            'n_corrupt'           : int(corrupt.sum()),
+            'n_retransmit_A'      : int(resent.sum()),
+            'n_to_layer5_B'       : len(delivered),
+            'bucket_width'        : bucket_width,
+            'delivered_per_bucket': delivered_per_bucket,
+            'sent_per_bucket'     : sent_per_bucket,
+            'resent_per_bucket'   : resent_per_bucket,
+            'lost_per_bucket'     : lost_per_bucket,
+            'sends'               : sends,
+            'numbers'             : numbers,
+            'resent'              : resent}
+
+def hot_spots(result, n):
+    # The n buckets with the most retransmissions, most first.
+    resent = result['resent_per_bucket']
+    order = np.argsort(-resent, kind='stable')[:n]
+    return [i for i in order.tolist() if resent[i] > 0]
+
+def write_time_sequence(result, path):
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['time', 'flow', 'entity', 'packet', 'seqnum', 'acknum',
+                    'retransmit', 'lost', 'corrupt'])
+        sends = result['sends']
+        for r, number, resent in zip(sends.tolist(),
+                                     result['numbers'].tolist(),
+                                     result['resent'].tolist()):
+            time, kind, entity, flags, flow, seqnum, acknum = r
+            w.writerow([time, flow, tracelog.ENTITY_NAMES[entity], number,
+                        seqnum, acknum, int(resent),
+                        int(bool(flags & tracelog.LOST)),
+                        int(bool(flags & tracelog.CORRUPT))])
+
+def write_series(result, path):
+    width = result['bucket_width']
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['time', 'throughput', 'n_to_layer3_A', 'n_retransmit_A',
+                    'n_lost'])
+        for i, (delivered, sent, resent, lost) in enumerate(zip(
+                result['delivered_per_bucket'].tolist(),
+                result['sent_per_bucket'].tolist(),
+                result['resent_per_bucket'].tolist(),
+                result['lost_per_bucket'].tolist())):
+            w.writerow([i * width, delivered / width, sent, resent, lost])
+
+def report(result, n_hot_spots):
+    time = result['time']
+    tput = result['n_to_layer5_B'] / time if time > 0.0 else 0.0
+    print(f'''RESUMEN DE LA TRAZA
+--------------------------------
+# registros:{result['n_records']}
+# flujos:{result['n_flows']}
+# tiempo del último registro:{time}
+# paquetes de la capa 3 enviados por A:{result['n_to_layer3_A']}
+# paquetes de la capa 3 enviados por B:{result['n_to_layer3_B']}
+# paquetes de la capa 3 perdidos:{result['n_lost']}
+# paquetes de la capa 3 corrompidos:{result['n_corrupt']}
+# retransmisiones de A:{result['n_retransmit_A']}
+# mensajes de la capa 5 entregados por B:{result['n_to_layer5_B']}
+# mensajes de la capa 5 por B/tiempo:{tput}
+--------------------------------''')
+    spots = hot_spots(result, n_hot_spots)
+    if not spots:
+        return
+    width = result['bucket_width']
+    print(f'''\nINTERVALOS CON MÁS RETRANSMISIONES
+--------------------------------
+{"inicio":>12} {"retransmisiones":>16} {"enviados por A":>15} {"perdidos":>9} {"entregados por B":>17}''')
+    for i in spots:
+        print(f'{i * width:>12.1f} {result["resent_per_bucket"][i]:>16}'
+              f' {result["sent_per_bucket"][i]:>15}'
+              f' {result["lost_per_bucket"][i]:>9}'
+              f' {result["delivered_per_bucket"][i]:>17}')
+    print('--------------------------------')
+
+if __name__ == '__main__':
+    desc = 'Análisis de una traza escrita con --trace-file, sin repetir la simulación.'
+    parser = argparse.ArgumentParser(description=desc)
+    parser.add_argument('trace',
+                        help='fichero de traza, binario o .jsonl')
+    parser.add_argument('-b', type=float, default=1000.0,
+                        dest='bucket_width',
+                        help=('ancho de los intervalos de las series'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('--flow', type=int, default=None,
+                        dest='flow',
+                        help=('analizar sólo este flujo'
+                              ' [int, por defecto: todos]'))
+    parser.add_argument('--top', type=int, default=5,
+                        dest='n_hot_spots',
+                        help=('número de intervalos con más retransmisiones'
+                              ' a mostrar [int, por defecto: %(default)s]'))
+    parser.add_argument('--tsd', default=None,
+                        dest='tsd_file',
+                        help=('escribir el diagrama tiempo-secuencia en este'
+                              ' CSV [por defecto: %(default)s]'))
+    parser.add_argument('--series', default=None,
+                        dest='series_file',
+                        help=('escribir las series de throughput y'
+                              ' retransmisiones en este CSV'
+                              ' [por defecto: %(default)s]'))
+    options = parser.parse_args()
+
+    result = analyze(load_trace(options.trace), options.bucket_width,
+                     options.flow)
+    report(result, options.n_hot_spots)
+    if options.tsd_file is not None:
+        write_time_sequence(result, options.tsd_file)
+    if options.series_file is not None:
+        write_series(result, options.series_file)
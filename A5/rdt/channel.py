@@ -0,0 +1,38 @@
+from collections import deque
+
+# Link model for the layer-3 channel, used instead of the random 1-9 time
+# unit delay when a bandwidth is given.
+#
+# Each direction is a router queue in front of a link.  A packet waits for
+# the packets ahead of it, takes size/bandwidth to be put on the link and
+# arrives prop_delay later.  When the queue already holds queue_limit
+# packets, counting the one on the link, the new one is dropped (tail
+# drop).  Packets leave in order, so the channel still cannot reorder.
+
+class LinkChannel:
+    def __init__(self, bandwidth, prop_delay, queue_limit=None):
+        self.bandwidth = bandwidth          # Bytes per time unit.
+        self.prop_delay = prop_delay
+        self.queue_limit = queue_limit      # Packets, or None for no limit.
+        self.queues = {}                    # direction -> deque of the times
+                                            # its queued packets finish sending.
+        self.max_queue = 0
+
+    def send(self, direction, now, size):
+        # Returns the arrival time of a packet of `size` bytes sent at `now`
+        # in `direction` (0 from A to B, 1 back), or None if the queue is
+        # full.  All flows share the queue of each direction.
+        q = self.queues.get(direction)
+        if q is None:
+            q = self.queues[direction] = deque()
+        while q and q[0] <= now:
+            q.popleft()
+        if (self.queue_limit is not None
+            and len(q) >= self.queue_limit):
+            return None
+        start = q[-1] if q else now
+        done = start + size / self.bandwidth
+        q.append(done)
+        if len(q) > self.max_queue:
+            self.max_queue = len(q)
+        return done + self.prop_delay
@@ -0,0 +1,287 @@
+import argparse
+
+from .engine import Simulator
+
+DESCRIPTION = 'Ejecutar una simulación de un protocolo de transporte de datos confiable.'
+
+def make_arg_parser(desc=DESCRIPTION, add_help=True):
+    parser = argparse.ArgumentParser(description=desc, add_help=add_help)
+    parser.add_argument('-n', type=int, default=10,
+                        dest='num_msgs',
+                        help=('número de mensajes a simular'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-d', type=float, default=100.0,
+                        dest='interarrival_time',
+                        help=('tiempo promedio entre mensajes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-z', type=int, default=16,
+                        dest='seqnum_limit',
+                        help=('límite de seqnum para el protocolo de transporte de datos; '
+                              'todos los seqnums de los paquetes deben ser >=0 y <límite'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-l', type=float, default=0.0,
+                        dest='loss_prob',
+                        help=('probabilidad de pérdida de paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-c', type=float, default=0.0,
+                        dest='corrupt_prob',
+                        help=('probabilidad de corrupción de paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-s', type=int,
+                        dest='random_seed',
+                        help=('semilla para el generador de números aleatorios'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('--loss-model', choices=['bernoulli', 'gilbert', 'replay'],
+                        default='bernoulli',
+                        dest='loss_model',
+                        help=('modelo de pérdida y corrupción del canal:'
+                              ' independiente (-l, -c), Gilbert-Elliott'
+                              ' (-l y -c en el estado bueno) o reproducción'
+                              ' de --loss-pattern [por defecto: %(default)s]'))
+    parser.add_argument('--ge-p', type=float, default=0.01,
+                        dest='ge_p',
+                        help=('Gilbert-Elliott: probabilidad de pasar al estado'
+                              ' malo en cada paquete'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('--ge-r', type=float, default=0.3,
+                        dest='ge_r',
+                        help=('Gilbert-Elliott: probabilidad de volver al estado'
+                              ' bueno en cada paquete'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('--ge-loss-bad', type=float, default=1.0,
+                        dest='ge_loss_bad',
+                        help=('Gilbert-Elliott: probabilidad de pérdida en el'
+                              ' estado malo [float, por defecto: %(default)s]'))
+    parser.add_argument('--ge-corrupt-bad', type=float, default=0.0,
+                        dest='ge_corrupt_bad',
+                        help=('Gilbert-Elliott: probabilidad de corrupción en el'
+                              ' estado malo [float, por defecto: %(default)s]'))
+    parser.add_argument('--loss-pattern', default=None,
+                        dest='loss_pattern',
+                        help=('fichero con el destino de cada paquete (L/1'
+                              ' perdido, C corrompido, ./0 intacto) o una traza'
+                              ' de --trace-file [por defecto: %(default)s]'))
+    parser.add_argument('--msg-size', type=int, default=20,
+                        dest='msg_size',
+                        help=('tamaño en bytes de los mensajes de la capa 5'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('--mtu', type=int, default=None,
+                        dest='mtu',
+                        help=('tamaño máximo en bytes de la carga de un paquete'
+                              ' [int, por defecto: el tamaño de los mensajes]'))
+    parser.add_argument('--batch', action='store_true',
+                        dest='batch',
+                        help=('goBackN.py: A empaqueta los mensajes en cola en'
+                              ' un solo paquete, hasta la MTU'))
+    parser.add_argument('--checksum', default='crc32',
+                        choices=['crc32', 'internet'],
+                        dest='checksum',
+                        help=('suma de comprobación de los paquetes: CRC-32 o,'
+                              ' para comparar, la suma de 16 bits de Internet'
+                              ' (RFC 1071), más lenta'
+                              ' [por defecto: %(default)s]'))
+    parser.add_argument('--bandwidth', type=float, default=None,
+                        dest='bandwidth',
+                        help=('ancho de banda del enlace en bytes por unidad de'
+                              ' tiempo; sin él, cada paquete tarda entre 1 y 9'
+                              ' unidades de tiempo [float, por defecto: %(default)s]'))
+    parser.add_argument('--prop-delay', type=float, default=1.0,
+                        dest='prop_delay',
+                        help=('retardo de propagación del enlace, con --bandwidth'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('--queue-limit', type=int, default=64,
+                        dest='queue_limit',
+                        help=('paquetes que caben en la cola del router antes de'
+                              ' descartar, con --bandwidth'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('--flows', type=int, default=1,
+                        dest='n_flows',
+                        help=('número de pares emisor/receptor que comparten el'
+                              ' canal, cada uno con -n mensajes; con --bandwidth'
+                              ' comparten también la cola del router'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-v', type=int, default=0,
+                        dest='trace',
+                        help=('nivel de seguimiento de eventos'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('--trace-file', default=None,
+                        dest='trace_file',
+                        help=('escribir todos los eventos en este fichero,'
+                              ' binario o .jsonl'
+                              ' [por defecto: %(default)s]'))
+    parser.add_argument('--profile-file', default=None,
+                        dest='profile_file',
+                        help=('medir el tiempo de cada manejador de eventos y'
+                              ' escribirlo en este fichero como pilas'
+                              ' colapsadas para un flame graph, en'
+                              ' microsegundos [por defecto: %(default)s]'))
+    parser.add_argument('--rto', choices=['fixed', 'adaptive'], default='fixed',
+                        dest='rto',
+                        help=('tiempo de retransmisión del emisor: fijo o'
+                              ' estimado a partir del RTT (Jacobson/Karels)'
+                              ' [por defecto: %(default)s]'))
+    parser.add_argument('--cc', choices=['none', 'aimd'], default='none',
+                        dest='cc',
+                        help=('goBackN.py: control de congestión del emisor,'
+                              ' con arranque lento, AIMD y retransmisión rápida'
+                              ' [por defecto: %(default)s]'))
+    parser.add_argument('--ack-every', type=int, default=1,
+                        dest='ack_every',
+                        help=('goBackN.py: B confirma cada N paquetes en orden'
+                              ' con un ack acumulativo'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('--ack-delay', type=float, default=5.0,
+                        dest='ack_delay',
+                        help=('goBackN.py: tiempo máximo que B retrasa un ack'
+                              ' si --ack-every > 1'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('--checkpoint', default=None,
+                        dest='checkpoint',
+                        help=('guardar el estado de la simulación en este'
+                              ' fichero cada --checkpoint-every mensajes'
+                              ' [por defecto: %(default)s]'))
+    parser.add_argument('--until-time', type=float, default=None,
+                        dest='until_time',
+                        help=('terminar la simulación en este tiempo simulado'
+                              ' (-n sigue siendo un límite; -n 0 no limita'
+                              ' los mensajes) [float, por defecto: %(default)s]'))
+    parser.add_argument('--warmup', type=float, default=0.0,
+                        dest='warmup',
+                        help=('tiempo de calentamiento excluido de las'
+                              ' estadísticas del estado estacionario'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('--ci-width', type=float, default=None,
+                        dest='ci_width',
+                        help=('terminar cuando la semiamplitud del intervalo de'
+                              ' confianza del throughput (medias por lotes) sea'
+                              ' como mucho esta fracción de la media'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('--batch-time', type=float, default=1000.0,
+                        dest='batch_time',
+                        help=('duración de cada lote de las medias por lotes;'
+                              ' debe ser mucho mayor que el RTT'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('--min-batches', type=int, default=10,
+                        dest='min_batches',
+                        help=('lotes mínimos antes de comprobar --ci-width'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        dest='confidence',
+                        help=('nivel de confianza del intervalo del throughput'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('--checkpoint-every', type=int, default=100000,
+                        dest='checkpoint_every',
+                        help=('mensajes entre dos puntos de control'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('--resume', action='store_true',
+                        dest='resume',
+                        help=('continuar desde --checkpoint si el fichero existe;'
+                              ' las demás opciones deben ser las mismas'))
+    parser.add_argument('--metrics-bucket', type=float, default=1000.0,
+                        dest='metrics_bucket',
+                        help=('ancho de los intervalos de la serie de throughput'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('--metrics-file', default=None,
+                        dest='metrics_file',
+                        help=('escribir latencias y la serie de throughput'
+                              ' en este fichero JSON'
+                              ' [por defecto: %(default)s]'))
+    return parser
+
+def default_options(**overrides):
+    # The command-line defaults, for building a Simulator from code.
+    options = make_arg_parser().parse_args([])
+    for name, value in overrides.items():
+        if not hasattr(options, name):
+            raise AttributeError(f'unknown simulator option: {name}')
+        setattr(options, name, value)
+    return options
+
+def run_protocol(module, options=None, cbA=None, cbB=None, **overrides):
+    # Runs module's EntityA and EntityB to the end and returns the
+    # Simulator.  options may be any namespace parsed with make_arg_parser
+    # as a parent, e.g. a benchmark's: the simulator options in it are
+    # used, changed by overrides, and anything else is skipped.  cbA and
+    # cbB are the Simulator's to_layer5 callbacks.
+    if options is not None:
+        overrides = {**{name: getattr(options, name)
+                        for name in vars(default_options())
+                        if hasattr(options, name)},
+                     **overrides}
+    sim = Simulator(default_options(**overrides), module.EntityA, module.EntityB,
+                    cbA, cbB)
+    sim.run()
+    return sim
+
+def report_config(sim):
+    stats = sim.get_stats()
+    print(f'''CONFIGURACIÓN DE LA SIMULACIÓN
+--------------------------------------
+(-n) # mensajes de la capa 5 a proporcionar:{stats['n_sim_max']}
+(-d) tiempo promedio entre mensajes de la capa 5:{stats['interarrival_time']}
+(-z) límite de seqnum para el protocolo de transporte de datos:{stats['seqnum_limit']}
+(-l) probabilidad de pérdida de paquetes de la capa 3:{stats['loss_prob']}
+(-c) probabilidad de corrupción de paquetes de la capa 3:{stats['corrupt_prob']}
+(-s) semilla aleatoria de la simulación:{stats['random_seed']}
+--------------------------------------''')
+
+def report_results(sim):
+    stats = sim.get_stats()
+    print(f'''\nRESUMEN DE LA SIMULACIÓN
+--------------------------------
+# mensajes de la capa 5 proporcionados a A:{stats['n_sim']}
+# tiempo transcurrido:{stats['time']}
+
+# paquetes de la capa 3 enviados por A:{stats['n_to_layer3_A']}
+# paquetes de la capa 3 enviados por B:{stats['n_to_layer3_B']}
+# paquetes de la capa 3 perdidos:{stats['n_lost']}
+# paquetes de la capa 3 corrompidos:{stats['n_corrupt']}
+# paquetes de la capa 3 descartados en la cola del router:{stats['n_dropped']}
+# mensajes de la capa 5 entregados por A:{stats['n_to_layer5_A']}
+# mensajes de la capa 5 entregados por B:{stats['n_to_layer5_B']}
+# mensajes de la capa 5 por B/tiempo transcurrido:{stats['throughput']}
+# bytes de la capa 5 por B/tiempo transcurrido:{stats['bytes_throughput']}
+
+# retransmisiones de A:{stats['n_retransmit_A']}
+# retransmisiones innecesarias de A:{stats['n_spurious_A']}
+# latencia extremo a extremo media:{stats['latency_mean']}
+# latencia extremo a extremo p50/p95/p99:{stats['latency_p50']}/{stats['latency_p95']}/{stats['latency_p99']}
+--------------------------------''')
+    if stats['n_flows'] > 1:
+        print(f'''\nFLUJOS
+--------------------------------
+# índice de equidad de Jain:{stats['fairness_index']}
+{"flujo":>6} {"enviados por A":>15} {"entregados por B":>17} {"bytes/tiempo":>13} {"latencia p95":>13}''')
+        for f in sim.get_flow_stats():
+            p95 = f['latency_p95'] if f['latency_p95'] is not None else float('nan')
+            print(f'{f["flow"]:>6} {f["n_to_layer3_A"]:>15} {f["n_to_layer5_B"]:>17}'
+                  f' {f["bytes_throughput"]:>13.5f} {p95:>13.3f}')
+        print('--------------------------------')
+    if sim.steady_state:
+        ci = stats['throughput_ci']
+        ci_text = f'{ci[0]} ± {ci[1]}' if ci is not None else None
+        print(f'''\nESTADO ESTACIONARIO
+--------------------------------
+# fin de la simulación:{stats['stop_reason']}
+# tiempo de calentamiento excluido:{stats['warmup']}
+# tiempo medido:{stats['steady_time']}
+# mensajes de la capa 5 por B/tiempo medido:{stats['steady_throughput']}
+# retransmisiones de A en el tiempo medido:{stats['steady_n_retransmit_A']}
+# latencia extremo a extremo media en el tiempo medido:{stats['steady_latency_mean']}
+# lotes:{stats['n_batches']}
+# throughput por lotes (intervalo al {sim.options.confidence:.0%}):{ci_text}
+--------------------------------''')
+    profile = sim.get_profile()
+    if profile is not None:
+        frames = profile.by_frame()
+        run_time = frames['run'][1]
+        print(f'''\nPERFIL (tiempo propio, {sim.profile_file})
+--------------------------------
+{"marco":>28} {"llamadas":>10} {"total (s)":>10} {"propio (s)":>11} {"% propio":>9}''')
+        for name, (calls, total, self_time) in sorted(frames.items(),
+                                                      key=lambda f: -f[1][2]):
+            print(f'{name:>28} {calls:>10} {total:>10.3f} {self_time:>11.3f}'
+                  f' {100 * self_time / run_time:>9.1f}')
+        print('--------------------------------')
+    if sim.metrics_file is not None:
+        sim.get_metrics().write_json(sim.metrics_file)
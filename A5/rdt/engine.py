@@ -0,0 +1,981 @@
+from enum import Enum, auto
+import heapq
+from itertools import count
+import math
+import os
+import pickle
+import random
+import time
+
+from .channel import LinkChannel
+from .impairment import make_impairment
+from .metrics import Metrics, mean_confidence_interval
+from .packet import CHECKSUMS, Msg, Pkt
+from .profiling import Profile
+from . import tracelog
+
+# Entity-side API.  Every entity created by a Simulator carries a reference to
+# it in `entity.sim`, so these calls reach the right simulator even when
+# several simulators run in the same process.
+
+def start_timer(calling_entity, increment):
+    calling_entity.sim.start_timer(calling_entity, increment)
+
+def stop_timer(calling_entity):
+    calling_entity.sim.stop_timer(calling_entity)
+
+def to_layer3(calling_entity, packet):
+    calling_entity.sim.to_layer3(calling_entity, packet)
+
+def to_layer5(calling_entity, message):
+    calling_entity.sim.to_layer5(calling_entity, message)
+
+def get_time(calling_entity):
+    return calling_entity.sim.get_time(calling_entity)
+
+def record_cwnd(calling_entity, cwnd):
+    calling_entity.sim.record_cwnd(calling_entity, cwnd)
+
+class EventType(Enum):
+    TIMER_INTERRUPT = auto()
+    FROM_LAYER5 = auto()
+    FROM_LAYER3 = auto()
+    # Simulator-side events for the steady-state stop conditions; they have
+    # no entity.
+    WARMUP_END = auto()
+    BATCH_END = auto()
+    TIME_LIMIT = auto()
+
+CONTROL_EVENTS = (EventType.WARMUP_END, EventType.BATCH_END,
+                  EventType.TIME_LIMIT)
+
+class Event:
+    __slots__ = ('ev_time', 'ev_type', 'ev_entity', 'packet')
+
+    def __init__(self, ev_time, ev_type, ev_entity, packet=None):
+        self.ev_time = ev_time      # float
+        self.ev_type = ev_type      # EventType
+        self.ev_entity = ev_entity  # entity_A or entity_B
+        self.packet = packet        # Pkt or None
+
+def make_rng(seed, stream):
+    # A generator for one named stream of the simulation with this seed.
+    # Seeding with a string hashes it with SHA-512, so the streams are
+    # unrelated to each other and the same in every process.
+    return random.Random(f'{seed}/{stream}')
+
+class Flow:
+    # One sender/receiver pair.  Its entities point back to it in
+    # `entity.flow`.
+
+    def __init__(self, index, metrics):
+        self.index = index
+        self.entity_A = None
+        self.entity_B = None
+        self.metrics = metrics
+        self.n_sim = 0
+        self.n_to_layer3_A = 0
+        self.n_to_layer3_B = 0
+        self.n_to_layer5_A = 0
+        self.n_to_layer5_B = 0
+        self.n_bytes_to_layer5_B = 0
+        self.receiving = None       # seqnum of the packet B is taking in.
+
+    def get_stats(self, time):
+        stats = {'flow'               : self.index,
+                 'n_sim'              : self.n_sim,
+                 'n_to_layer3_A'      : self.n_to_layer3_A,
+                 'n_to_layer3_B'      : self.n_to_layer3_B,
+                 'n_to_layer5_A'      : self.n_to_layer5_A,
+                 'n_to_layer5_B'      : self.n_to_layer5_B,
+                 'n_bytes_to_layer5_B': self.n_bytes_to_layer5_B,
+                 'throughput'         : (self.n_to_layer5_B / time
+                                         if time > 0.0 else 0.0),
+                 'bytes_throughput'   : (self.n_bytes_to_layer5_B / time
+                                         if time > 0.0 else 0.0)
+        }
+        stats.update(self.metrics.get_stats())
+        return stats
+
+class Simulator:
+    def __new__(cls, options, *args, **kwargs):
+        # Pick the event loop once, at startup: runs without tracing or
+        # profiling get the plain Simulator, whose hot paths carry no checks
+        # for either.
+        if cls is Simulator:
+            tracing = options.trace > 0 or options.trace_file is not None
+            if options.profile_file is not None:
+                if tracing:
+                    raise ValueError('--profile-file cannot be combined'
+                                     ' with -v or --trace-file')
+                cls = ProfilingSimulator
+            elif tracing:
+                cls = TracingSimulator
+        return super().__new__(cls)
+
+    def __init__(self, options, entity_A_class, entity_B_class,
+                 cbA=None, cbB=None):
+        if (options.resume
+            and options.checkpoint is not None
+            and os.path.exists(options.checkpoint)):
+            self._load_checkpoint(options, cbA, cbB)
+            return
+
+        if options.n_flows < 1:
+            raise ValueError(f'number of flows ({options.n_flows}) smaller than 1')
+        # Each of the n_flows flows gets num_msgs messages; 0 means no
+        # limit, for runs that stop on time or on the throughput estimate.
+        if options.num_msgs == 0:
+            if options.until_time is None and options.ci_width is None:
+                raise ValueError('num_msgs 0 needs --until-time or --ci-width')
+            num_msgs = math.inf
+        else:
+            num_msgs = options.num_msgs
+        self.n_flows              = options.n_flows
+        self.n_sim                = 0
+        self.n_sim_per_flow       = num_msgs
+        self.n_sim_max            = num_msgs * options.n_flows
+        self.time                 = 0.000
+        self.interarrival_time    = options.interarrival_time
+        self.loss_prob            = options.loss_prob
+        self.corrupt_prob         = options.corrupt_prob
+        self.seqnum_limit         = options.seqnum_limit
+        self.msg_size             = options.msg_size
+        if options.mtu is None:
+            self.mtu              = options.msg_size
+        else:
+            self.mtu              = options.mtu
+        if self.msg_size < 1:
+            raise ValueError(f'message size ({self.msg_size}) smaller than 1')
+        if self.mtu < self.msg_size:
+            raise ValueError(f'MTU ({self.mtu}) smaller than the message'
+                             f' size ({self.msg_size})')
+        self.n_to_layer3_A        = 0
+        self.n_to_layer3_B        = 0
+        self.n_lost               = 0
+        self.n_corrupt            = 0
+        self.n_dropped            = 0
+        self.n_to_layer5_A        = 0
+        self.n_to_layer5_B        = 0
+        self.n_bytes_to_layer5_B  = 0
+
+        if options.random_seed is None:
+            self.random_seed      = time.time_ns()
+        else:
+            self.random_seed      = options.random_seed
+        # Separate generators for each source of randomness, all derived
+        # from the seed: a model that draws more or fewer numbers leaves
+        # the streams of the others alone, and no two simulators share one.
+        self.rng_arrival          = make_rng(self.random_seed, 'arrival')
+        self.rng_loss             = make_rng(self.random_seed, 'loss')
+        self.rng_corrupt          = make_rng(self.random_seed, 'corrupt')
+        self.rng_delay            = make_rng(self.random_seed, 'delay')
+
+        if self.seqnum_limit < 2:
+            self.seqnum_limit_n_bits = 0
+        else:
+            # How many bits to represent integers in [0, seqnum_limit-1]?
+            self.seqnum_limit_n_bits = (self.seqnum_limit-1).bit_length()
+
+        self.checksum             = CHECKSUMS[options.checksum]
+        self.impairment           = make_impairment(options, self.rng_loss,
+                                                    self.rng_corrupt)
+        if options.bandwidth is None:
+            self.link             = None
+        else:
+            self.link             = LinkChannel(options.bandwidth,
+                                                options.prop_delay,
+                                                options.queue_limit)
+
+        self.trace                = options.trace
+        self.trace_file           = options.trace_file
+        self.profile_file         = options.profile_file
+        self.metrics_file         = options.metrics_file
+        self.to_layer5_callback_A = cbA
+        self.to_layer5_callback_B = cbB
+
+        self.options              = options
+        self.flows                = []
+        for i in range(self.n_flows):
+            flow = Flow(i, Metrics(options.metrics_bucket))
+            flow.entity_A = self._make_entity(entity_A_class, flow)
+            flow.entity_B = self._make_entity(entity_B_class, flow)
+            self.flows.append(flow)
+        # The entities of the first flow, the only one by default.
+        self.entity_A             = self.flows[0].entity_A
+        self.entity_B             = self.flows[0].entity_B
+        # Heap of [ev_time, -insertion_number, event] entries.  A cancelled
+        # timer keeps its entry with the event replaced by None.
+        self.event_list           = []
+        self.event_counter        = count()
+        self.n_events             = 0       # Events taken off the list.
+        self.timers               = {}
+        # Arrival time of the newest packet in flight to each entity, when
+        # there is no link model.
+        self.last_arrival         = {}
+        self.started              = False
+        # Steady-state estimate: counters at the end of the warm-up, and
+        # the throughput of each batch after it (batch means).
+        self.steady_state         = (options.until_time is not None
+                                     or options.warmup > 0.0
+                                     or options.ci_width is not None)
+        self.warmup_counts        = None
+        self.batch_means          = []
+        self.batch_start_count    = 0
+        self.stop_reason          = None
+        self.checkpoint           = options.checkpoint
+        self.checkpoint_every     = options.checkpoint_every
+
+    def _make_entity(self, entity_class, flow):
+        # The entity gets `sim` before its __init__ runs, so the constructor
+        # can already read self.sim.options.
+        entity = entity_class.__new__(entity_class)
+        entity.sim = self
+        entity.flow = flow
+        entity.__init__(self.seqnum_limit)
+        return entity
+
+    def get_metrics(self):
+        # Metrics of all the flows together.
+        if len(self.flows) == 1:
+            return self.flows[0].metrics
+        return Metrics.combine([f.metrics for f in self.flows])
+
+    def get_profile(self):
+        # The Profile of the run, for a ProfilingSimulator.
+        return None
+
+    def get_flow_stats(self):
+        return [f.get_stats(self.time) for f in self.flows]
+
+    def fairness_index(self):
+        # Jain's fairness index of the bytes each flow delivered: 1 when all
+        # get the same, 1/n_flows when one flow gets everything.
+        x = [f.n_bytes_to_layer5_B for f in self.flows]
+        total = sum(x)
+        if total == 0:
+            return None
+        return total*total / (len(x) * sum(v*v for v in x))
+
+    def get_stats(self):
+        stats = {'n_sim'             : self.n_sim,
+                 'n_sim_max'         : self.n_sim_max,
+                 'n_flows'           : self.n_flows,
+                 'time'              : self.time,
+                 'interarrival_time' : self.interarrival_time,
+                 'loss_prob'         : self.loss_prob,
+                 'corrupt_prob'      : self.corrupt_prob,
+                 'loss_model'        : self.options.loss_model,
+                 'seqnum_limit'      : self.seqnum_limit,
+                 'msg_size'          : self.msg_size,
+                 'mtu'               : self.mtu,
+                 'checksum'          : self.options.checksum,
+                 'random_seed'       : self.random_seed,
+                 'n_to_layer3_A'     : self.n_to_layer3_A,
+                 'n_to_layer3_B'     : self.n_to_layer3_B,
+                 'n_lost'            : self.n_lost,
+                 'n_corrupt'         : self.n_corrupt,
+                 'n_dropped'         : self.n_dropped,
+                 'max_queue'         : self.link.max_queue if self.link else None,
+                 'n_to_layer5_A'     : self.n_to_layer5_A,
+                 'n_to_layer5_B'     : self.n_to_layer5_B,
+                 'n_bytes_to_layer5_B': self.n_bytes_to_layer5_B,
+                 'throughput'        : (self.n_to_layer5_B / self.time
+                                        if self.time > 0.0 else 0.0),
+                 'bytes_throughput'  : (self.n_bytes_to_layer5_B / self.time
+                                        if self.time > 0.0 else 0.0),
+                 'n_events'          : self.n_events,
+                 'fairness_index'    : self.fairness_index(),
+                 'stop_reason'       : self.stop_reason
+        }
+        stats.update(self.get_metrics().get_stats())
+        stats.update(self.get_steady_stats())
+        return stats
+
+    def get_steady_stats(self):
+        # Stats of the run after the warm-up, and the batch-means confidence
+        # interval of its throughput.  None until the warm-up is over.
+        stats = {'warmup'                : self.options.warmup,
+                 'steady_time'           : None,
+                 'steady_throughput'     : None,
+                 'steady_n_retransmit_A' : None,
+                 'steady_latency_mean'   : None,
+                 'n_batches'             : len(self.batch_means),
+                 'throughput_ci'         : None}
+        if self.warmup_counts is None or self.time <= self.options.warmup:
+            return stats
+        n_to_layer5_B, n_retransmit, n_latencies = self.warmup_counts
+        steady_time = self.time - self.options.warmup
+        latencies = [x for f, n in zip(self.flows, n_latencies)
+                     for x in f.metrics.latencies[n:]]
+        stats['steady_time'] = steady_time
+        stats['steady_throughput'] = (self.n_to_layer5_B - n_to_layer5_B) / steady_time
+        stats['steady_n_retransmit_A'] = (sum(f.metrics.n_retransmit for f in self.flows)
+                                          - n_retransmit)
+        if latencies:
+            stats['steady_latency_mean'] = math.fsum(latencies) / len(latencies)
+        if len(self.batch_means) > 1:
+            stats['throughput_ci'] = mean_confidence_interval(self.batch_means,
+                                                              self.options.confidence)
+        return stats
+
+    def run(self):
+        if not self.started:
+            self.started = True
+            for flow in self.flows:
+                self._generate_next_arrival(flow.entity_A)
+            if self.options.until_time is not None:
+                self._insert_event(Event(self.options.until_time,
+                                         EventType.TIME_LIMIT, None))
+            if self.steady_state:
+                self._insert_event(Event(self.options.warmup,
+                                         EventType.WARMUP_END, None))
+
+        # With checkpoints, run in stretches of checkpoint_every messages.
+        # The event loop stops between two events, so a run that stops and
+        # goes on is the same as one that does not.
+        while self.n_sim < self.n_sim_max:
+            if self.checkpoint is None:
+                stop = self.n_sim_max
+            else:
+                stop = min(self.n_sim + self.checkpoint_every, self.n_sim_max)
+            if not self._run_until(stop):
+                break
+            if (self.checkpoint is not None
+                and self.n_sim < self.n_sim_max):
+                self.save_checkpoint()
+        if self.stop_reason is None:
+            self.stop_reason = ('num_msgs' if self.n_sim >= self.n_sim_max
+                                else 'event_list')
+
+    def _control(self, ev):
+        # Handles a steady-state event; True if the run must stop now.
+        if ev.ev_type == EventType.TIME_LIMIT:
+            self.stop_reason = 'until_time'
+            return True
+        if ev.ev_type == EventType.WARMUP_END:
+            self.warmup_counts = (self.n_to_layer5_B,
+                                  sum(f.metrics.n_retransmit for f in self.flows),
+                                  [len(f.metrics.latencies) for f in self.flows])
+        else:
+            self.batch_means.append((self.n_to_layer5_B - self.batch_start_count)
+                                    / self.options.batch_time)
+            ci_width = self.options.ci_width
+            if (ci_width is not None
+                and len(self.batch_means) >= self.options.min_batches):
+                mean, half_width = mean_confidence_interval(self.batch_means,
+                                                            self.options.confidence)
+                if mean > 0.0 and half_width <= ci_width * mean:
+                    self.stop_reason = 'ci_width'
+                    return True
+        self.batch_start_count = self.n_to_layer5_B
+        self._insert_event(Event(self.time + self.options.batch_time,
+                                 EventType.BATCH_END, None))
+        return False
+
+    def _run_until(self, n_sim_stop):
+        # Runs until n_sim_stop messages have been generated; False if the
+        # event list runs out or a stop condition is met first.
+        # This is the only event loop: TracingSimulator and
+        # ProfilingSimulator override the handlers below and the entity
+        # calls they make, so the plain Simulator has no trace checks at all.
+        while self.n_sim < n_sim_stop:
+            ev = self._pop_event()
+            if ev is None:
+                return False
+
+            self.time = ev.ev_time
+
+            if ev.ev_type == EventType.FROM_LAYER5:
+                self._from_layer5(ev.ev_entity)
+
+            elif ev.ev_type == EventType.FROM_LAYER3:
+                self._from_layer3(ev.ev_entity, ev.packet)
+
+            elif ev.ev_type == EventType.TIMER_INTERRUPT:
+                self._timer_interrupt(ev.ev_entity)
+
+            elif ev.ev_type in CONTROL_EVENTS:
+                if self._control(ev):
+                    return False
+
+            else:
+                print('INTERNAL ERROR: unknown event type; event ignored.')
+        return True
+
+    def _from_layer5(self, entity):
+        flow = entity.flow
+        if flow.n_sim == self.n_sim_per_flow:
+            return                  # This flow is done; others are not.
+        self._generate_next_arrival(entity)
+        j = flow.n_sim % 26
+        m = bytes([97+j for i in range(self.msg_size)])
+        flow.n_sim += 1
+        self.n_sim += 1
+        flow.metrics.message_generated(self.time)
+        self._entity_output(entity, Msg(m))
+
+    def _from_layer3(self, entity, packet):
+        if self.last_arrival.get(entity) == self.time:
+            del self.last_arrival[entity]
+        flow = entity.flow
+        if entity is flow.entity_B:
+            flow.receiving = packet.seqnum
+        self._entity_input(entity, packet.copy())
+        flow.receiving = None
+
+    def _timer_interrupt(self, entity):
+        del self.timers[entity]
+        self._entity_timer_interrupt(entity)
+
+    # The calls into the entities, one per event.
+    def _entity_output(self, entity, message):
+        entity.output(message)
+
+    def _entity_input(self, entity, packet):
+        entity.input(packet)
+
+    def _entity_timer_interrupt(self, entity):
+        entity.timer_interrupt()
+
+    # Checkpoints hold everything the rest of the run depends on: counters,
+    # flows and entities, the event list, timers, metrics and the random
+    # generators.  The entities point back to the simulator; the file stands
+    # for it with a persistent id, so loading fills in the Simulator being
+    # built.
+
+    # Attributes left out: callbacks may not be picklable and are passed
+    # again, the rest is set from the options of the resumed run.
+    NOT_CHECKPOINTED = ('to_layer5_callback_A', 'to_layer5_callback_B',
+                        'options', 'trace', 'trace_file', 'profile_file',
+                        'metrics_file', 'checkpoint', 'checkpoint_every',
+                        'sink', 'profile', 'checksum')
+    # Options that may change between a run and its resumption.
+    RUN_OPTIONS = ('resume', 'checkpoint', 'checkpoint_every', 'trace',
+                   'trace_file', 'profile_file', 'metrics_file')
+
+    def _checkpoint_state(self):
+        state = {name: value for name, value in self.__dict__.items()
+                 if name not in self.NOT_CHECKPOINTED}
+        n = next(self.event_counter)
+        self.event_counter = count(n)
+        state['event_counter'] = n
+        state['sim_options'] = {name: value
+                                for name, value in vars(self.options).items()
+                                if name not in self.RUN_OPTIONS}
+        return state
+
+    def save_checkpoint(self):
+        # Write to a temporary file first, so an interruption never leaves
+        # a broken checkpoint behind.
+        tmp_path = self.checkpoint + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            _CheckpointPickler(f, self).dump(self._checkpoint_state())
+        os.replace(tmp_path, self.checkpoint)
+
+    def _load_checkpoint(self, options, cbA, cbB):
+        with open(options.checkpoint, 'rb') as f:
+            state = _CheckpointUnpickler(f, self).load()
+        sim_options = {name: value for name, value in vars(options).items()
+                       if name not in self.RUN_OPTIONS}
+        if state['sim_options'] != sim_options:
+            changed = sorted(name for name in sim_options.keys() | state['sim_options'].keys()
+                             if sim_options.get(name) != state['sim_options'].get(name))
+            raise ValueError(f'options differ from those of checkpoint'
+                             f' {options.checkpoint}: {", ".join(changed)}')
+        self.event_counter = count(state.pop('event_counter'))
+        del state['sim_options']
+        self.__dict__.update(state)
+        self.options = options
+        self.trace = options.trace
+        self.trace_file = options.trace_file
+        self.profile_file = options.profile_file
+        self.metrics_file = options.metrics_file
+        self.checksum = CHECKSUMS[options.checksum]
+        self.checkpoint = options.checkpoint
+        self.checkpoint_every = options.checkpoint_every
+        self.to_layer5_callback_A = cbA
+        self.to_layer5_callback_B = cbB
+
+    def _insert_event(self, event):
+        # Among events with the same time, the most recently inserted one
+        # comes out first, as with the old sorted-list insertion.
+        entry = [event.ev_time, -next(self.event_counter), event]
+        heapq.heappush(self.event_list, entry)
+        return entry
+
+    def _pop_event(self):
+        while self.event_list:
+            ev = heapq.heappop(self.event_list)[2]
+            if ev is not None:
+                self.n_events += 1
+                return ev
+        return None
+
+    def _generate_next_arrival(self, entity):
+        x = self.interarrival_time * 2.0 * self.rng_arrival.random()
+        ev = Event(self.time+x, EventType.FROM_LAYER5, entity)
+        self._insert_event(ev)
+
+    def _valid_entity(self, e, method_name):
+        if getattr(e, 'sim', None) is self:
+            return True
+        print(f'''WARNING: entity in call to `{method_name}` is invalid!
+  Invalid entity: {e}
+  Call ignored.''')
+        return False
+
+    def _valid_increment(self, i, method_name):
+        if ((type(i) is int or type(i) is float)
+            and i >= 0.0):
+            return True
+        print(f'''WARNING: increment in call to `{method_name}` is invalid!
+  Invalid increment: {i}
+  Call ignored.''')
+        return False
+
+    def _valid_message(self, m, method_name):
+        if (type(m) is Msg
+            and type(m.data) is bytes
+            and len(m.data) == self.msg_size):
+            return True
+        print(f'''WARNING: message in call to `{method_name}` is invalid!
+  Invalid message: {m}
+  Call ignored.''')
+        return False
+
+    def _valid_packet(self, p, method_name):
+        if (type(p) is Pkt
+            and type(p.seqnum) is int
+            and 0 <= p.seqnum < self.seqnum_limit
+            and type(p.acknum) is int
+            and 0 <= p.acknum < self.seqnum_limit
+            and type(p.checksum) is int
+            and type(p.payload) is bytes
+            and len(p.payload) <= self.mtu):
+            return True
+        # Issue special warnings for invalid seqnums and acknums.
+        if (type(p.seqnum) is int
+            and not (0 <= p.seqnum < self.seqnum_limit)):
+            print(f'''WARNING: seqnum in call to `{method_name}` is invalid!
+  Invalid packet: {p}
+  Call ignored.''')
+        elif (type(p.acknum) is int
+              and not (0 <= p.acknum < self.seqnum_limit)):
+            print(f'''WARNING: acknum in call to `{method_name}` is invalid!
+  Invalid packet: {p}
+  Call ignored.''')
+        else:
+            print(f'''WARNING: packet in call to `{method_name}` is invalid!
+  Invalid packet: {p}
+  Call ignored.''')
+        return False
+
+    def start_timer(self, entity, increment):
+        if not self._valid_entity(entity, 'start_timer'):
+            return
+        if not self._valid_increment(increment, 'start_timer'):
+            return
+
+        if entity in self.timers:
+            print('WARNING: attempt to start a timer that is already started!')
+            return
+
+        ev = Event(self.time+increment, EventType.TIMER_INTERRUPT, entity)
+        self.timers[entity] = self._insert_event(ev)
+
+    def stop_timer(self, entity):
+        if not self._valid_entity(entity, 'stop_timer'):
+            return
+
+        entry = self.timers.pop(entity, None)
+        if entry is not None:
+            entry[2] = None
+        else:
+            print('WARNING: unable to stop timer; it was not running.')
+
+    def to_layer3(self, entity, packet):
+        if not self._valid_entity(entity, 'to_layer3'):
+            return
+        if not self._valid_packet(packet, 'to_layer3'):
+            return
+
+        flow = entity.flow
+        if entity is flow.entity_A:
+            receiver = flow.entity_B
+            direction = 0
+            flow.n_to_layer3_A += 1
+            self.n_to_layer3_A += 1
+        else:
+            receiver = flow.entity_A
+            direction = 1
+            flow.n_to_layer3_B += 1
+            self.n_to_layer3_B += 1
+
+        if self.link is None:
+            arrival_time = None
+            p = self._through_channel(packet)
+        else:
+            # The packet has to get into the router queue first; once on the
+            # link it may still be lost or corrupted.
+            size = Pkt.HEADER_SIZE + len(packet.payload)
+            arrival_time = self.link.send(direction, self.time, size)
+            if arrival_time is None:
+                self.n_dropped += 1
+                p = None
+            else:
+                p = self._through_channel(packet)
+        # B accepted the packet it is taking in if it acknowledges it, e.g.
+        # Selective Repeat buffering it, or delivers it (see to_layer5).
+        if direction == 0:
+            flow.metrics.packet_sent(self.time, packet)
+        elif packet.acknum == flow.receiving:
+            flow.metrics.packet_accepted(packet.acknum)
+        if p is not None:
+            self._schedule_arrival(receiver, p, arrival_time)
+
+    def _through_channel(self, packet):
+        # Returns the packet as it comes out of the medium, or None if lost.
+        # Simulate losses.
+        if self.impairment.lose():
+            self.n_lost += 1
+            return None
+
+        seqnum = packet.seqnum
+        acknum = packet.acknum
+        checksum = packet.checksum
+        payload = packet.payload
+
+        # Simulate corruption.
+        if self.impairment.corrupt():
+            self.n_corrupt += 1
+            x = self.rng_corrupt.random()
+            if (x < 0.75
+                or self.seqnum_limit_n_bits == 0):
+                payload = b'Z' + payload[1:]
+            elif x < 0.875:
+                # Flip a random bit in the seqnum.
+                # The result might be greater than seqnum_limit if seqnum_limit
+                # is not a power of two.  This is OK.
+                # Recall that randrange(x) returns an int in [0, x).
+                seqnum ^= 2**self.rng_corrupt.randrange(self.seqnum_limit_n_bits)
+                # Kurose's simulator simply did:
+                # seqnum = 999999
+            else:
+                # Flip a random bit in the acknum.
+                acknum ^= 2**self.rng_corrupt.randrange(self.seqnum_limit_n_bits)
+                # Kurose's simulator simply did:
+                # acknum = 999999
+
+        return Pkt(seqnum, acknum, checksum, payload)
+
+    def _schedule_arrival(self, receiver, p, arrival_time=None):
+        # Without a link model, compute the arrival time of packet at the
+        # other end.
+        # Medium cannot reorder, so make sure packet arrives between 1 and 9
+        # time units after the latest arrival time of packets
+        # currently in the medium on their way to the destination.
+        if arrival_time is None:
+            last_time = self.last_arrival.get(receiver, self.time)
+            arrival_time = last_time + 1.0 + 8.0*self.rng_delay.random()
+            self.last_arrival[receiver] = arrival_time
+
+        ev = Event(arrival_time, EventType.FROM_LAYER3, receiver, p)
+        self._insert_event(ev)
+
+    def to_layer5(self, entity, message):
+        if not self._valid_entity(entity, 'to_layer5'):
+            return
+        if not self._valid_message(message, 'to_layer5'):
+            return
+
+        flow = entity.flow
+        if entity is flow.entity_A:
+            flow.n_to_layer5_A += 1
+            self.n_to_layer5_A += 1
+            callback = self.to_layer5_callback_A
+        else:
+            flow.n_to_layer5_B += 1
+            flow.n_bytes_to_layer5_B += len(message.data)
+            self.n_to_layer5_B += 1
+            self.n_bytes_to_layer5_B += len(message.data)
+            flow.metrics.message_delivered(self.time)
+            if flow.receiving is not None:
+                flow.metrics.packet_accepted(flow.receiving)
+            callback = self.to_layer5_callback_B
+
+        if callback:
+            callback(message.data)
+
+    def get_time(self, entity):
+        if not self._valid_entity(entity, 'get_time'):
+            return
+        return self.time
+
+    def record_cwnd(self, entity, cwnd):
+        # Congestion window of A over time, for the metrics.
+        if not self._valid_entity(entity, 'record_cwnd'):
+            return
+        if entity is entity.flow.entity_A:
+            entity.flow.metrics.cwnd_changed(self.time, cwnd)
+
+
+class _CheckpointPickler(pickle.Pickler):
+    def __init__(self, f, sim):
+        super().__init__(f, pickle.HIGHEST_PROTOCOL)
+        self.sim = sim
+
+    def persistent_id(self, obj):
+        return 'sim' if obj is self.sim else None
+
+class _CheckpointUnpickler(pickle.Unpickler):
+    def __init__(self, f, sim):
+        super().__init__(f)
+        self.sim = sim
+
+    def persistent_load(self, pid):
+        return self.sim
+
+
+class TracingSimulator(Simulator):
+    # Simulator that prints the -v trace and, if options.trace_file is set,
+    # writes every event to a structured trace (see tracelog.py).
+
+    def run(self):
+        self.sink = None
+        if self.trace_file is not None:
+            # A resumed run drops what the trace got after the checkpoint.
+            offset = None
+            if (self.started
+                and getattr(self, 'trace_offset', None) is not None
+                and self.trace_offset[0] == self.trace_file):
+                offset = self.trace_offset[1]
+            self.sink = tracelog.open_trace_sink(self.trace_file, offset)
+        try:
+            if self.trace>0:
+                print('\n===== SIMULATION BEGINS')
+            super().run()
+            if self.trace>0:
+                print('===== SIMULATION ENDS')
+        finally:
+            if self.sink is not None:
+                self.sink.close()
+
+    def _checkpoint_state(self):
+        if self.sink is not None:
+            self.trace_offset = (self.trace_file, self.sink.tell())
+        return super()._checkpoint_state()
+
+    def _pop_event(self):
+        ev = super()._pop_event()
+        if ev is not None and self.trace>2:
+            print(f'\nEVENT time: {ev.ev_time}, ', end='')
+            if ev.ev_type == EventType.TIMER_INTERRUPT:
+                print(f'timer_interrupt, ', end='')
+            elif ev.ev_type == EventType.FROM_LAYER5:
+                print(f'from_layer5, ', end='')
+            elif ev.ev_type == EventType.FROM_LAYER3:
+                print(f'from_layer3, ', end='')
+            elif ev.ev_type in CONTROL_EVENTS:
+                print(f'{ev.ev_type.name.lower()}, ', end='')
+            else:
+                print(f'unknown_type, ', end='')
+            print(f'entity: {ev.ev_entity}')
+        return ev
+
+    def _entity_output(self, entity, message):
+        self._record(tracelog.FROM_LAYER5, entity)
+        if self.trace>2:
+            print(f'          MAINLOOP: data given to student: {message.data}')
+        super()._entity_output(entity, message)
+
+    def _entity_input(self, entity, packet):
+        self._record(tracelog.FROM_LAYER3, entity, packet)
+        super()._entity_input(entity, packet)
+
+    def _entity_timer_interrupt(self, entity):
+        self._record(tracelog.TIMER_INTERRUPT, entity)
+        super()._entity_timer_interrupt(entity)
+
+    def _record(self, kind, entity, packet=None, flags=0):
+        if self.sink is None:
+            return
+        flow = entity.flow
+        e = 0 if entity is flow.entity_A else 1
+        if packet is None:
+            self.sink.write(self.time, kind, e, flow=flow.index % 256)
+        else:
+            self.sink.write(self.time, kind, e, packet.seqnum, packet.acknum,
+                            flags, flow.index % 256)
+
+    def _insert_event(self, event):
+        if self.trace>2:
+            print(f'            INSERTEVENT: time is {self.time}')
+            print(f'            INSERTEVENT: future time will be {event.ev_time}')
+        return super()._insert_event(event)
+
+    def _generate_next_arrival(self, entity):
+        if self.trace>2:
+            print('          GENERATE NEXT ARRIVAL: creating new arrival')
+        super()._generate_next_arrival(entity)
+
+    def start_timer(self, entity, increment):
+        if not (self._valid_entity(entity, 'start_timer')
+                and self._valid_increment(increment, 'start_timer')):
+            return
+        if self.trace>2:
+            print(f'          START TIMER: starting timer at {self.time}')
+        self._record(tracelog.START_TIMER, entity)
+        super().start_timer(entity, increment)
+
+    def stop_timer(self, entity):
+        if not self._valid_entity(entity, 'stop_timer'):
+            return
+        if self.trace>2:
+            print(f'          STOP TIMER: stopping timer at {self.time}')
+        self._record(tracelog.STOP_TIMER, entity)
+        super().stop_timer(entity)
+
+    def to_layer3(self, entity, packet):
+        n_sent = self.n_to_layer3_A + self.n_to_layer3_B
+        n_lost = self.n_lost
+        n_dropped = self.n_dropped
+        n_corrupt = self.n_corrupt
+        super().to_layer3(entity, packet)
+        if n_sent == self.n_to_layer3_A + self.n_to_layer3_B:
+            return      # Invalid call, ignored.
+        flags = 0
+        if self.n_dropped != n_dropped:
+            # Tail drops are recorded as losses.
+            if self.trace>0:
+                print('          TO_LAYER3: packet dropped by the router queue')
+            flags |= tracelog.LOST
+        if self.n_lost != n_lost:
+            flags |= tracelog.LOST
+        if self.n_corrupt != n_corrupt:
+            flags |= tracelog.CORRUPT
+        self._record(tracelog.TO_LAYER3, entity, packet, flags)
+
+    def _through_channel(self, packet):
+        n_corrupt = self.n_corrupt
+        p = super()._through_channel(packet)
+        if self.trace>0:
+            if p is None:
+                print('          TO_LAYER3: packet being lost')
+            elif self.n_corrupt != n_corrupt:
+                print('          TO_LAYER3: packet being corrupted')
+        return p
+
+    def _schedule_arrival(self, receiver, p, arrival_time=None):
+        if self.trace>2:
+            print('          TO_LAYER3: scheduling arrival on other side')
+        super()._schedule_arrival(receiver, p, arrival_time)
+
+    def to_layer5(self, entity, message):
+        if not (self._valid_entity(entity, 'to_layer5')
+                and self._valid_message(message, 'to_layer5')):
+            return
+        self._record(tracelog.TO_LAYER5, entity)
+        if self.trace>2:
+            print(f'          TO_LAYER5: data received: {message.data}')
+        super().to_layer5(entity, message)
+
+class ProfilingSimulator(Simulator):
+    # Simulator that times its event loop into a Profile (see profiling.py)
+    # and writes it to options.profile_file as collapsed stacks.  Stacks
+    # start at 'run', then the event type, the entity callback (e.g.
+    # EntityA.input) and the simulator calls it makes.  A resumed run
+    # profiles only what it runs itself.
+
+    def run(self):
+        self.profile = Profile()
+        self.profile.enter('run')
+        super().run()
+        self.profile.leave()
+        self.profile.write_collapsed(self.profile_file)
+
+    def get_profile(self):
+        return getattr(self, 'profile', None)
+
+    def save_checkpoint(self):
+        self.profile.enter('save_checkpoint')
+        super().save_checkpoint()
+        self.profile.leave()
+
+    def _from_layer5(self, entity):
+        self.profile.enter('from_layer5')
+        super()._from_layer5(entity)
+        self.profile.leave()
+
+    def _from_layer3(self, entity, packet):
+        self.profile.enter('from_layer3')
+        super()._from_layer3(entity, packet)
+        self.profile.leave()
+
+    def _timer_interrupt(self, entity):
+        self.profile.enter('timer_interrupt')
+        super()._timer_interrupt(entity)
+        self.profile.leave()
+
+    def _entity_output(self, entity, message):
+        self.profile.enter(type(entity).__name__ + '.output')
+        super()._entity_output(entity, message)
+        self.profile.leave()
+
+    def _entity_input(self, entity, packet):
+        self.profile.enter(type(entity).__name__ + '.input')
+        super()._entity_input(entity, packet)
+        self.profile.leave()
+
+    def _entity_timer_interrupt(self, entity):
+        self.profile.enter(type(entity).__name__ + '.timer_interrupt')
+        super()._entity_timer_interrupt(entity)
+        self.profile.leave()
+
+    def _pop_event(self):
+        self.profile.enter('_pop_event')
+        ev = super()._pop_event()
+        self.profile.leave()
+        return ev
+
+    def _insert_event(self, event):
+        self.profile.enter('_insert_event')
+        entry = super()._insert_event(event)
+        self.profile.leave()
+        return entry
+
+    def _generate_next_arrival(self, entity):
+        self.profile.enter('_generate_next_arrival')
+        super()._generate_next_arrival(entity)
+        self.profile.leave()
+
+    def start_timer(self, entity, increment):
+        self.profile.enter('start_timer')
+        super().start_timer(entity, increment)
+        self.profile.leave()
+
+    def stop_timer(self, entity):
+        self.profile.enter('stop_timer')
+        super().stop_timer(entity)
+        self.profile.leave()
+
+    def to_layer3(self, entity, packet):
+        self.profile.enter('to_layer3')
+        super().to_layer3(entity, packet)
+        self.profile.leave()
+
+    def _through_channel(self, packet):
+        self.profile.enter('_through_channel')
+        p = super()._through_channel(packet)
+        self.profile.leave()
+        return p
+
+    def to_layer5(self, entity, message):
+        self.profile.enter('to_layer5')
+        super().to_layer5(entity, message)
+        self.profile.leave()
+
+    def record_cwnd(self, entity, cwnd):
+        self.profile.enter('record_cwnd')
+        super().record_cwnd(entity, cwnd)
+        self.profile.leave()
@@ -0,0 +1,118 @@
+from . import tracelog
+
+# Channel impairment models: they decide, packet by packet, whether the
+# medium loses or corrupts it.  The simulator calls lose() once for every
+# packet and corrupt() only for those that were not lost.  The random models
+# draw from the simulator's loss and corruption generators, seeded from -s.
+
+class BernoulliImpairment:
+    # Independent losses and corruptions, as in Kurose's simulator.
+
+    def __init__(self, loss_prob, corrupt_prob, rng_loss, rng_corrupt):
+        self.loss_prob = loss_prob
+        self.corrupt_prob = corrupt_prob
+        self.rng_loss = rng_loss
+        self.rng_corrupt = rng_corrupt
+
+    def lose(self):
+        return self.rng_loss.random() < self.loss_prob
+
+    def corrupt(self):
+        return self.rng_corrupt.random() < self.corrupt_prob
+
+class GilbertElliottImpairment:
+    # Two-state Markov channel.  Before each packet the channel goes from the
+    # good state to the bad one with probability p, and back with
+    # probability r, so bad periods last 1/r packets on average.  Each state
+    # has its own loss and corruption probabilities.
+
+    def __init__(self, p, r, loss_good, loss_bad, corrupt_good, corrupt_bad,
+                 rng_loss, rng_corrupt):
+        self.p = p
+        self.r = r
+        self.loss = (loss_good, loss_bad)
+        self.corrupt_prob = (corrupt_good, corrupt_bad)
+        self.rng_loss = rng_loss
+        self.rng_corrupt = rng_corrupt
+        self.bad = False
+
+    def lose(self):
+        # The state changes are part of the loss stream.
+        if self.bad:
+            if self.rng_loss.random() < self.r:
+                self.bad = False
+        elif self.rng_loss.random() < self.p:
+            self.bad = True
+        return self.rng_loss.random() < self.loss[self.bad]
+
+    def corrupt(self):
+        return self.rng_corrupt.random() < self.corrupt_prob[self.bad]
+
+    def mean_loss_prob(self):
+        if self.p + self.r == 0.0:
+            return self.loss[self.bad]
+        p_bad = self.p / (self.p + self.r)
+        return (1.0 - p_bad) * self.loss[False] + p_bad * self.loss[True]
+
+class ReplayImpairment:
+    # Replays a recorded pattern, one entry per packet, starting over when it
+    # runs out.  The pattern is either a text file where 'L' or '1' marks a
+    # lost packet, 'C' a corrupted one and '.' or '0' one that got through
+    # ('#' starts a comment), or a trace written with --trace-file, whose
+    # to_layer3 records give the fate of each packet of the recorded run.
+
+    OK = 0
+
+    def __init__(self, path):
+        self.pattern = read_pattern(path)
+        if not self.pattern:
+            raise ValueError(f'empty loss pattern: {path}')
+        self.i = -1
+
+    def lose(self):
+        self.i = (self.i + 1) % len(self.pattern)
+        return self.pattern[self.i] == tracelog.LOST
+
+    def corrupt(self):
+        return self.pattern[self.i] == tracelog.CORRUPT
+
+PATTERN_CODES = {'.': ReplayImpairment.OK, '0': ReplayImpairment.OK,
+                 'L': tracelog.LOST, '1': tracelog.LOST,
+                 'C': tracelog.CORRUPT}
+
+def read_pattern(path):
+    with open(path, 'rb') as f:
+        is_trace = (f.read(len(tracelog.MAGIC)) == tracelog.MAGIC
+                    or path.lower().endswith('.jsonl'))
+    pattern = bytearray()
+    if is_trace:
+        for time, kind, entity, flags, flow, seqnum, acknum in tracelog.read_records(path):
+            if kind == tracelog.TO_LAYER3:
+                # A lost packet is never also corrupted.
+                pattern.append(tracelog.LOST if flags & tracelog.LOST
+                               else flags & tracelog.CORRUPT)
+        return pattern
+    with open(path) as f:
+        for line in f:
+            for c in line.split('#', 1)[0]:
+                if c.isspace():
+                    continue
+                if c not in PATTERN_CODES:
+                    raise ValueError(f'invalid character {c!r} in loss pattern: {path}')
+                pattern.append(PATTERN_CODES[c])
+    return pattern
+
+def make_impairment(options, rng_loss, rng_corrupt):
+    if options.loss_model == 'bernoulli':
+        return BernoulliImpairment(options.loss_prob, options.corrupt_prob,
+                                   rng_loss, rng_corrupt)
+    if options.loss_model == 'gilbert':
+        return GilbertElliottImpairment(options.ge_p, options.ge_r,
+                                        options.loss_prob, options.ge_loss_bad,
+                                        options.corrupt_prob, options.ge_corrupt_bad,
+                                        rng_loss, rng_corrupt)
+    if options.loss_model == 'replay':
+        if options.loss_pattern is None:
+            raise ValueError('--loss-model replay needs --loss-pattern')
+        return ReplayImpairment(options.loss_pattern)
+    raise ValueError(f'unknown loss model: {options.loss_model}')
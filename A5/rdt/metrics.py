@@ -0,0 +1,160 @@
+from array import array
+import json
+import math
+from statistics import NormalDist, fmean, stdev
+
+# Delivery metrics gathered by the Simulator while it runs.
+#
+# Latency is measured from the FROM_LAYER5 event that hands a message to A to
+# the to_layer5 call that delivers it at B.  Protocols deliver in order and
+# exactly once, so the k-th delivery at B is the k-th message handed to A;
+# only the times of undelivered messages are kept, in a flat array of
+# doubles read from a head index, and the latencies go into another one.
+
+def mean_confidence_interval(values, confidence=0.95):
+    # (mean, half width) of a normal-approximation confidence interval for
+    # the mean of values, e.g. batch means or the results of Monte Carlo
+    # replicas.  values may be a NumPy array.
+    values = [float(v) for v in values]
+    mean = fmean(values)
+    if len(values) < 2:
+        return mean, math.inf
+    z = NormalDist().inv_cdf(0.5 + confidence/2)
+    return mean, z * stdev(values) / math.sqrt(len(values))
+
+class Metrics:
+    def __init__(self, bucket_width):
+        self.bucket_width = bucket_width
+        self.pending = array('d')           # Times of undelivered messages
+        self.pending_head = 0               # from pending_head on.
+        self.latencies = array('d')
+        self.sorted_latencies = array('d')  # Sorted copy, for percentiles.
+        self.delivered_per_bucket = array('L')
+        self.retransmits_per_bucket = array('L')
+        self.n_retransmit = 0
+        self.n_spurious = 0
+        self.last_sent = {}                 # seqnum -> last Pkt A sent.
+        self.accepted = {}                  # seqnum -> B took a copy of it.
+        self.cwnd_times = array('d')        # Congestion window changes, for
+        self.cwnd_values = array('d')       # senders that have one.
+
+    @classmethod
+    def combine(cls, parts):
+        # The metrics of several flows taken together.  The cwnd series
+        # belong to each flow and are left out.
+        total = cls(parts[0].bucket_width)
+        for m in parts:
+            total.latencies.extend(m.latencies)
+            total.n_retransmit += m.n_retransmit
+            total.n_spurious += m.n_spurious
+            for series, part in ((total.delivered_per_bucket, m.delivered_per_bucket),
+                                 (total.retransmits_per_bucket, m.retransmits_per_bucket)):
+                if len(part) > len(series):
+                    series.extend([0] * (len(part) - len(series)))
+                for i, n in enumerate(part):
+                    series[i] += n
+        return total
+
+    def message_generated(self, time):
+        self.pending.append(time)
+
+    def message_delivered(self, time):
+        if self.pending_head < len(self.pending):
+            self.latencies.append(time - self.pending[self.pending_head])
+            self.pending_head += 1
+            # Drop the delivered times once they are half the array.
+            if self.pending_head * 2 > len(self.pending):
+                del self.pending[:self.pending_head]
+                self.pending_head = 0
+        self._count(self.delivered_per_bucket, time)
+
+    def packet_sent(self, time, packet):
+        # Protocols resend the Pkt object they kept, so a send of the same
+        # object as the last one with that seqnum is a retransmission.  It
+        # is spurious if B already accepted an earlier copy.
+        if self.last_sent.get(packet.seqnum) is packet:
+            self.n_retransmit += 1
+            if self.accepted[packet.seqnum]:
+                self.n_spurious += 1
+            self._count(self.retransmits_per_bucket, time)
+        else:
+            self.last_sent[packet.seqnum] = packet
+            self.accepted[packet.seqnum] = False
+
+    def packet_accepted(self, seqnum):
+        # B delivered or buffered a copy of the last packet A sent with
+        # this seqnum.
+        if seqnum in self.accepted:
+            self.accepted[seqnum] = True
+
+    def cwnd_changed(self, time, cwnd):
+        # Only changes are kept, e.g. not repeated timeouts at cwnd 1.
+        if self.cwnd_values and self.cwnd_values[-1] == cwnd:
+            return
+        self.cwnd_times.append(time)
+        self.cwnd_values.append(cwnd)
+
+    def cwnd_series(self):
+        # (time, cwnd) pairs, or None if the sender has no congestion window.
+        if not self.cwnd_times:
+            return None
+        return list(zip(self.cwnd_times, self.cwnd_values))
+
+    def _count(self, series, time):
+        i = int(time // self.bucket_width)
+        if i >= len(series):
+            series.extend([0] * (i+1 - len(series)))
+        series[i] += 1
+
+    def latency_percentiles(self, qs=(0.50, 0.95, 0.99)):
+        if not self.latencies:
+            return [None for q in qs]
+        # Latencies are only appended, so the sorted copy is stale iff it
+        # is shorter.
+        if len(self.sorted_latencies) != len(self.latencies):
+            self.sorted_latencies = array('d', sorted(self.latencies))
+        s = self.sorted_latencies
+        # Nearest-rank percentiles.
+        return [s[max(0, math.ceil(q*len(s)) - 1)] for q in qs]
+
+    def latency_mean(self):
+        if not self.latencies:
+            return None
+        return math.fsum(self.latencies) / len(self.latencies)
+
+    def throughput_series(self):
+        # (bucket start time, messages delivered per time unit, retransmissions)
+        n = max(len(self.delivered_per_bucket), len(self.retransmits_per_bucket))
+        series = []
+        for i in range(n):
+            delivered = (self.delivered_per_bucket[i]
+                         if i < len(self.delivered_per_bucket) else 0)
+            retransmits = (self.retransmits_per_bucket[i]
+                           if i < len(self.retransmits_per_bucket) else 0)
+            series.append((i * self.bucket_width,
+                           delivered / self.bucket_width,
+                           retransmits))
+        return series
+
+    def get_stats(self):
+        p50, p95, p99 = self.latency_percentiles()
+        stats = {'latency_mean'  : self.latency_mean(),
+                 'latency_p50'   : p50,
+                 'latency_p95'   : p95,
+                 'latency_p99'   : p99,
+                 'n_retransmit_A': self.n_retransmit,
+                 'n_spurious_A'  : self.n_spurious,
+                 'cwnd_series'   : self.cwnd_series()
+        }
+        return stats
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({'stats'        : self.get_stats(),
+                       'bucket_width' : self.bucket_width,
+                       'series'       : [{'time'       : t,
+                                          'throughput' : tput,
+                                          'n_retransmit': r}
+                                         for t, tput, r
+                                         in self.throughput_series()]},
+                      f, indent=1)
@@ -0,0 +1,270 @@
+import argparse
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .metrics import mean_confidence_interval
+
+# Monte Carlo estimates of protocol efficiency from many independent
+# replicas simulated at once, e.g. from A5/:
+#
+#   python -m rdt.montecarlo -p goBackN -r 1000 -n 1000 -d 20 -l 0.1
+#
+# Every replica runs the same event-driven model as the Simulator with the
+# protocol's default settings (fixed timeout, one ack per packet, random
+# 1-9 time unit delays, independent losses and corruptions), but the state
+# of all replicas lives in NumPy arrays: each step takes the next event of
+# every unfinished replica and handles each kind of event for all the
+# replicas that have it with array operations.  alternatingBitProtocol.py
+# is Go-Back-N with a window of one packet and no timer backoff.
+#
+# Replicas draw from their own NumPy generator, not from `random`, so they
+# match the Simulator in distribution but not seed by seed.
+
+# Event kinds, the columns of the next-event time matrix.
+MESSAGE = 0
+TIMER = 1
+DATA_AT_B = 2
+ACK_AT_A = 3
+
+def protocol_params(protocol, seqnum_limit):
+    # (window size, timeout, back off while no progress?) of each sender.
+    if protocol == 'alternatingBitProtocol':
+        return 1, 10.0, False
+    if protocol == 'goBackN':
+        return seqnum_limit//2, 10.0 + 4.0 * seqnum_limit//2, True
+    raise ValueError(f'no vectorized model for protocol: {protocol}')
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('rdt.montecarlo needs NumPy (pip install numpy)')
+
+class _Channel:
+    # One direction of the medium for every replica: a FIFO ring of the
+    # packets in flight, with their arrival times, numbers and corruption.
+
+    def __init__(self, n_replicas, capacity):
+        self.time = np.full((n_replicas, capacity), np.inf)
+        self.num = np.zeros((n_replicas, capacity), dtype=np.int64)
+        self.bad = np.zeros((n_replicas, capacity), dtype=bool)
+        self.head = np.zeros(n_replicas, dtype=np.int64)
+        self.count = np.zeros(n_replicas, dtype=np.int64)
+        self.last = np.zeros(n_replicas)     # Newest arrival time in flight.
+
+    def next_time(self):
+        t = self.time[np.arange(len(self.head)), self.head]
+        return np.where(self.count > 0, t, np.inf)
+
+    def _grow(self):
+        # Unroll every ring so it starts at 0, then double the capacity.
+        capacity = self.time.shape[1]
+        idx = (self.head[:, None] + np.arange(capacity)) % capacity
+        for name, fill in (('time', np.inf), ('num', 0), ('bad', False)):
+            a = np.take_along_axis(getattr(self, name), idx, axis=1)
+            setattr(self, name, np.concatenate([a, np.full_like(a, fill)], axis=1))
+        self.head[:] = 0
+
+    def push(self, idx, num, now, rng, loss_prob, corrupt_prob):
+        # Send packet `num` from replicas idx at times now; the channel loses
+        # or corrupts it as Simulator._through_channel does.
+        if len(idx) == 0:
+            return
+        lost = rng.random(len(idx)) < loss_prob
+        bad = rng.random(len(idx)) < corrupt_prob
+        keep = ~lost
+        idx, num, now, bad = idx[keep], num[keep], now[keep], bad[keep]
+        if len(idx) == 0:
+            return
+        if self.count[idx].max() >= self.time.shape[1]:
+            self._grow()
+        start = np.where(self.count[idx] > 0, self.last[idx], now)
+        arrival = start + 1.0 + 8.0*rng.random(len(idx))
+        slot = (self.head[idx] + self.count[idx]) % self.time.shape[1]
+        self.time[idx, slot] = arrival
+        self.num[idx, slot] = num
+        self.bad[idx, slot] = bad
+        self.count[idx] += 1
+        self.last[idx] = arrival
+
+    def pop(self, idx):
+        slot = self.head[idx]
+        num = self.num[idx, slot]
+        bad = self.bad[idx, slot]
+        self.time[idx, slot] = np.inf
+        self.head[idx] = (slot + 1) % self.time.shape[1]
+        self.count[idx] -= 1
+        return num, bad
+
+def run_replicas(protocol, n_replicas, num_msgs, interarrival_time,
+                 seqnum_limit, loss_prob, corrupt_prob, seed=None):
+    # Simulates n_replicas independent runs.  Returns a dict of per-replica
+    # arrays named like the Simulator.get_stats() fields.
+    _require_numpy()
+    window_size, wait_time, backoff = protocol_params(protocol, seqnum_limit)
+    rng = np.random.default_rng(seed)
+    R = n_replicas
+
+    # Sequence numbers are not wrapped: the window is smaller than
+    # seqnum_limit, so wrapping changes nothing.
+    now = np.zeros(R)
+    done = np.zeros(R, dtype=bool)
+    next_msg = interarrival_time * 2.0 * rng.random(R)
+    timer = np.full(R, np.inf)
+    n_sim = np.zeros(R, dtype=np.int64)
+    backlog = np.zeros(R, dtype=np.int64)        # Messages waiting at A.
+    base = np.zeros(R, dtype=np.int64)
+    next_seqnum = np.zeros(R, dtype=np.int64)
+    made_progress = np.ones(R, dtype=bool)
+    n_no_progress = np.zeros(R, dtype=np.int64)
+    expected = np.zeros(R, dtype=np.int64)
+    n_to_layer3_A = np.zeros(R, dtype=np.int64)
+    n_to_layer3_B = np.zeros(R, dtype=np.int64)
+    n_to_layer5_B = np.zeros(R, dtype=np.int64)
+    n_new = np.zeros(R, dtype=np.int64)
+    to_B = _Channel(R, 4*window_size + 16)
+    to_A = _Channel(R, 4*window_size + 16)
+
+    def send_new(idx):
+        # Send the next packet of replicas idx; start the timer if the
+        # window was empty.
+        was_empty = next_seqnum[idx] == base[idx]
+        to_B.push(idx, next_seqnum[idx], now[idx], rng, loss_prob, corrupt_prob)
+        n_to_layer3_A[idx] += 1
+        n_new[idx] += 1
+        next_seqnum[idx] += 1
+        start = idx[was_empty]
+        timer[start] = now[start] + wait_time
+
+    while not done.all():
+        times = np.stack([next_msg, timer, to_B.next_time(), to_A.next_time()],
+                         axis=1)
+        kind = times.argmin(axis=1)
+        t = times[np.arange(R), kind]
+        live = ~done
+        now[live] = t[live]
+
+        idx = np.flatnonzero(live & (kind == MESSAGE))
+        if len(idx):
+            n_sim[idx] += 1
+            next_msg[idx] += interarrival_time * 2.0 * rng.random(len(idx))
+            room = next_seqnum[idx] - base[idx] < window_size
+            send_new(idx[room])
+            backlog[idx[~room]] += 1
+            done[idx[n_sim[idx] == num_msgs]] = True
+
+        idx = np.flatnonzero(live & (kind == DATA_AT_B))
+        if len(idx):
+            num, bad = to_B.pop(idx)
+            ok = ~bad & (num == expected[idx])
+            n_to_layer5_B[idx[ok]] += 1
+            expected[idx[ok]] += 1
+            # Ack the last packet received in order.
+            to_A.push(idx, expected[idx] - 1, now[idx], rng,
+                      loss_prob, corrupt_prob)
+            n_to_layer3_B[idx] += 1
+
+        idx = np.flatnonzero(live & (kind == ACK_AT_A))
+        if len(idx):
+            num, bad = to_A.pop(idx)
+            ok = ~bad & (num >= base[idx]) & (num < next_seqnum[idx])
+            idx = idx[ok]
+            base[idx] = num[ok] + 1
+            made_progress[idx] = True
+            n_no_progress[idx] = 0
+            timer[idx] = np.where(next_seqnum[idx] > base[idx],
+                                  now[idx] + wait_time, np.inf)
+            for _ in range(window_size):
+                more = idx[(backlog[idx] > 0)
+                           & (next_seqnum[idx] - base[idx] < window_size)]
+                if len(more) == 0:
+                    break
+                backlog[more] -= 1
+                send_new(more)
+
+        idx = np.flatnonzero(live & (kind == TIMER))
+        if len(idx):
+            stuck = idx[~made_progress[idx]]
+            n_no_progress[stuck] += 1
+            made_progress[idx] = False
+            # Go back: resend the whole window.
+            for j in range(window_size):
+                resend = idx[base[idx] + j < next_seqnum[idx]]
+                to_B.push(resend, base[resend] + j, now[resend], rng,
+                          loss_prob, corrupt_prob)
+                n_to_layer3_A[resend] += 1
+            if backoff:
+                timer[idx] = now[idx] + wait_time * (n_no_progress[idx] + 1)
+            else:
+                timer[idx] = now[idx] + wait_time
+
+    return {'n_sim'         : n_sim,
+            'time'          : now,
+            'n_to_layer3_A' : n_to_layer3_A,
+            'n_to_layer3_B' : n_to_layer3_B,
+            'n_to_layer5_B' : n_to_layer5_B,
+            'n_retransmit_A': n_to_layer3_A - n_new,
+            'throughput'    : n_to_layer5_B / now}
+
+def estimate(protocol, n_replicas, num_msgs, interarrival_time, seqnum_limit,
+             loss_prob, corrupt_prob, seed=None, confidence=0.95):
+    # Mean and confidence interval half width of throughput and
+    # retransmissions over n_replicas runs.
+    runs = run_replicas(protocol, n_replicas, num_msgs, interarrival_time,
+                        seqnum_limit, loss_prob, corrupt_prob, seed)
+    return {name: mean_confidence_interval(runs[name], confidence)
+            for name in ('throughput', 'n_retransmit_A', 'n_to_layer5_B')}
+
+if __name__ == '__main__':
+    desc = 'Estimación Monte Carlo vectorizada con NumPy de la eficiencia de un protocolo.'
+    parser = argparse.ArgumentParser(description=desc)
+    parser.add_argument('-p', default='goBackN',
+                        choices=['alternatingBitProtocol', 'goBackN'],
+                        dest='protocol',
+                        help='protocolo [por defecto: %(default)s]')
+    parser.add_argument('-r', type=int, default=1000,
+                        dest='n_replicas',
+                        help=('número de réplicas'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-n', type=int, default=1000,
+                        dest='num_msgs',
+                        help=('número de mensajes por réplica'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-d', type=float, default=100.0,
+                        dest='interarrival_time',
+                        help=('tiempo promedio entre mensajes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-z', type=int, default=16,
+                        dest='seqnum_limit',
+                        help=('límite de seqnum'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-l', type=float, default=0.0,
+                        dest='loss_prob',
+                        help=('probabilidad de pérdida de paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-c', type=float, default=0.0,
+                        dest='corrupt_prob',
+                        help=('probabilidad de corrupción de paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-s', type=int, default=None,
+                        dest='random_seed',
+                        help=('semilla del generador de NumPy'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        dest='confidence',
+                        help=('nivel de confianza de los intervalos'
+                              ' [float, por defecto: %(default)s]'))
+    options = parser.parse_args()
+
+    start = time.perf_counter()
+    result = estimate(options.protocol, options.n_replicas, options.num_msgs,
+                      options.interarrival_time, options.seqnum_limit,
+                      options.loss_prob, options.corrupt_prob,
+                      options.random_seed, options.confidence)
+    elapsed = time.perf_counter() - start
+    print(f'{options.n_replicas} réplicas en {elapsed:.2f} s'
+          f' (intervalos al {options.confidence:.0%})')
+    for name, (mean, half_width) in result.items():
+        print(f'{name:>15}: {mean:.6g} ± {half_width:.3g}')
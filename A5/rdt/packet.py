@@ -0,0 +1,73 @@
+from binascii import crc32
+import struct
+
+class Msg:
+    MSG_SIZE = 20
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return 'Msg(data=%s)' % (self.data)
+
+
+class Pkt:
+    HEADER_SIZE = 12        # seqnum, acknum and checksum, 4 bytes each.
+    __slots__ = ('seqnum', 'acknum', 'checksum', 'payload')
+
+    def __init__(self, seqnum, acknum, checksum, payload):
+        self.seqnum = seqnum
+        self.acknum = acknum
+        self.checksum = checksum
+        self.payload = payload
+
+    def __str__(self):
+        return ('Pkt(seqnum=%s, acknum=%s, checksum=%s, payload=%s)'
+                % (self.seqnum, self.acknum, self.checksum, self.payload))
+
+    def copy(self):
+        # All fields are immutable, so a shallow copy is as good as deepcopy.
+        return Pkt(self.seqnum, self.acknum, self.checksum, self.payload)
+
+
+# Checksums cover seqnum and acknum, packed as 4-byte big-endian ints, and
+# the payload.  'crc32' is the default; 'internet' is the 16-bit ones'
+# complement sum of RFC 1071, for comparison only: in Python it is several
+# times slower than zlib's CRC-32.  Both catch every corruption the
+# simulator makes.
+
+HEADER = struct.Struct('>II')
+
+def crc32_checksum(seqnum, acknum, payload):
+    return crc32(payload, crc32(HEADER.pack(seqnum, acknum)))
+
+def internet_checksum(seqnum, acknum, payload):
+    data = HEADER.pack(seqnum, acknum) + payload
+    if len(data) % 2:
+        data += b'\0'
+    # The ones' complement sum of the 16-bit words is the number they make
+    # up modulo 0xFFFF, since 2**16 == 1 (mod 0xFFFF), except that a
+    # nonzero sum is 0xFFFF rather than 0.
+    n = int.from_bytes(data, 'big')
+    s = n % 0xFFFF
+    if s == 0 and n != 0:
+        s = 0xFFFF
+    return ~s & 0xFFFF
+
+CHECKSUMS = {'crc32'   : crc32_checksum,
+             'internet': internet_checksum}
+
+# Each Simulator has its own checksum function, from --checksum, in
+# `sim.checksum`: both ends of its flows use it, and other simulators in
+# the same process may use another.
+
+def pkt_compute_checksum(calling_entity, packet):
+    return calling_entity.sim.checksum(packet.seqnum, packet.acknum,
+                                       packet.payload)
+
+def pkt_insert_checksum(calling_entity, packet):
+    packet.checksum = pkt_compute_checksum(calling_entity, packet)
+
+def pkt_is_corrupt(calling_entity, packet):
+    return pkt_compute_checksum(calling_entity, packet) != packet.checksum
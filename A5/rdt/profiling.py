@@ -0,0 +1,55 @@
+import time
+
+# Wall time and call counts of the simulator's event handlers, entity
+# callbacks and API calls, kept per call stack.  Frames are entered and
+# left explicitly by ProfilingSimulator; each stack gets the time spent in
+# it minus the time spent in the frames it called (its self time), which is
+# what flame graph tools expect.
+#
+# write_collapsed writes the "frame;frame;frame value" lines read by
+# flamegraph.pl, speedscope and inferno, with values in microseconds.
+
+class Profile:
+    def __init__(self):
+        self.stack = []
+        self.starts = []
+        self.child_times = []       # Time spent in each open frame's callees.
+        self.self_times = {}        # Stack (tuple of names) -> seconds.
+        self.calls = {}             # Stack -> number of calls.
+        self.clock = time.perf_counter
+
+    def enter(self, name):
+        self.stack.append(name)
+        self.child_times.append(0.0)
+        self.starts.append(self.clock())
+
+    def leave(self):
+        elapsed = self.clock() - self.starts.pop()
+        key = tuple(self.stack)
+        self.stack.pop()
+        self_time = elapsed - self.child_times.pop()
+        self.self_times[key] = self.self_times.get(key, 0.0) + self_time
+        self.calls[key] = self.calls.get(key, 0) + 1
+        if self.child_times:
+            self.child_times[-1] += elapsed
+
+    def by_frame(self):
+        # {name: [calls, total seconds, self seconds]}, summed over every
+        # stack the frame appears in.  A frame's total is the self time of
+        # the stacks under it; a name repeated in a stack counts once.
+        frames = {}
+        for key, self_time in self.self_times.items():
+            name = key[-1]
+            row = frames.setdefault(name, [0, 0.0, 0.0])
+            row[0] += self.calls[key]
+            row[2] += self_time
+            for other in set(key):
+                frames.setdefault(other, [0, 0.0, 0.0])[1] += self_time
+        return frames
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            for key, self_time in sorted(self.self_times.items()):
+                us = round(self_time * 1e6)
+                if us > 0:
+                    f.write(f'{";".join(key)} {us}\n')
@@ -0,0 +1,84 @@
+# Retransmission timeouts: the senders' fixed ones, and an adaptive one
+# after Jacobson/Karels (RFC 6298).
+#
+# Senders start their timers for rto, call on_ack for every ack of new data
+# and restart the timer for on_timeout() when it expires.  on_ack takes the
+# round-trip time of the acked packet, measured with get_time(), or None if
+# it was retransmitted: by Karn's rule, its ack could belong to either copy.
+#
+# The adaptive timeout doubles on each timeout; as in most TCP
+# stacks, an ack for new data undoes the backoff even if it gave no sample,
+# otherwise a sender that keeps retransmitting never gets a clean sample
+# and stays backed off.  The backoff stops at 8 times the initial timeout:
+# these channels lose packets far more often than a real network, and a
+# longer cap leaves the sender idle for most of the run.
+
+class FixedTimeout:
+    # The sender's own timeout.  With linear_backoff, the k-th timeout in a
+    # row without an ack for new data waits k times as long.
+
+    def __init__(self, wait_time, linear_backoff=False):
+        self.rto = wait_time
+        self.linear_backoff = linear_backoff
+        self.n_timeouts = 0
+
+    def on_ack(self, rtt):
+        self.n_timeouts = 0
+
+    def on_timeout(self):
+        self.n_timeouts += 1
+        if self.linear_backoff:
+            return self.rto * self.n_timeouts
+        return self.rto
+
+class RttEstimator:
+    ALPHA = 1/8
+    BETA = 1/4
+    K = 4
+
+    def __init__(self, initial_rto, min_rto=1.0, max_rto=None):
+        self.srtt = None
+        self.rttvar = None
+        self.base_rto = initial_rto
+        self.n_backoff = 0
+        self.min_rto = min_rto
+        self.max_rto = 8 * initial_rto if max_rto is None else max_rto
+
+    @property
+    def rto(self):
+        return min(self.base_rto * 2**self.n_backoff, self.max_rto)
+
+    def sample(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = ((1 - self.BETA) * self.rttvar
+                           + self.BETA * abs(self.srtt - rtt))
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.base_rto = max(self.srtt + self.K * self.rttvar, self.min_rto)
+        self.n_backoff = 0
+
+    def backoff(self):
+        if self.rto < self.max_rto:
+            self.n_backoff += 1
+
+    def new_ack(self):
+        self.n_backoff = 0
+
+    def on_ack(self, rtt):
+        if rtt is None:
+            self.new_ack()
+        else:
+            self.sample(rtt)
+
+    def on_timeout(self):
+        self.backoff()
+        return self.rto
+
+def make_rtt_estimator(entity, wait_time, linear_backoff=False):
+    # The timeout a sender should use for --rto: adaptive, starting from
+    # wait_time, or fixed at wait_time, backed off as above.
+    if entity.sim.options.rto == 'adaptive':
+        return RttEstimator(wait_time)
+    return FixedTimeout(wait_time, linear_backoff)
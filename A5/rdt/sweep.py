@@ -0,0 +1,160 @@
+import argparse
+import csv
+import importlib
+import itertools
+import json
+import multiprocessing
+import os
+
+from .cli import run_protocol
+
+# Run a protocol over a grid of parameters and seeds on a process pool and
+# collect every Simulator.get_stats() into one table, e.g. from A5/:
+#
+#   python -m rdt.sweep -p goBackN -l 0.0 0.1 0.2 -z 8 16 -s 1 2 3 -o gbn.csv
+#
+# Every finished run is appended to the output file right away.  Running the
+# same command again skips the points already in the file, so an interrupted
+# sweep picks up where it stopped.  The output format follows the file
+# extension: .csv or .jsonl (one JSON object per line).
+
+KEY_FIELDS = ('protocol', 'num_msgs', 'interarrival_time', 'seqnum_limit',
+              'loss_prob', 'corrupt_prob', 'random_seed')
+
+def make_grid(protocols, num_msgs, interarrival_times, seqnum_limits,
+              loss_probs, corrupt_probs, seeds):
+    for values in itertools.product(protocols, num_msgs, interarrival_times,
+                                    seqnum_limits, loss_probs, corrupt_probs,
+                                    seeds):
+        yield dict(zip(KEY_FIELDS, values))
+
+def point_key(row):
+    # Values are compared as text so rows read back from a CSV file match.
+    return tuple(str(row[f]) for f in KEY_FIELDS)
+
+def run_point(point):
+    module = importlib.import_module(point['protocol'])
+    sim = run_protocol(module, **{f: point[f] for f in KEY_FIELDS
+                                  if f != 'protocol'})
+    row = dict(point)
+    row.update(sim.get_stats())
+    return row
+
+def _is_csv(path):
+    return os.path.splitext(path)[1].lower() == '.csv'
+
+def load_done(path):
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, newline='') as f:
+        # A run killed mid-write leaves a last line with no newline; it is
+        # dropped when the sweep resumes, and its point redone.
+        lines = [line for line in f if line.endswith('\n')]
+    if _is_csv(path):
+        rows = csv.DictReader(lines)
+    else:
+        rows = (json.loads(line) for line in lines)
+    for row in rows:
+        if all(row.get(k) not in (None, '') for k in KEY_FIELDS):
+            done.add(point_key(row))
+    return done
+
+def _drop_partial_line(path):
+    # Truncate the file after its last newline.
+    with open(path, 'r+b') as f:
+        data = f.read()
+        f.truncate(data.rfind(b'\n') + 1)
+
+class ResultWriter:
+    def __init__(self, path):
+        self.path = path
+        self.csv = _is_csv(path)
+        self.writer = None
+        if os.path.exists(path):
+            _drop_partial_line(path)
+        resuming = os.path.exists(path) and os.path.getsize(path) > 0
+        self.f = open(path, 'a', newline='')
+        if resuming and self.csv:
+            # Keep the columns of the existing header.
+            with open(path, newline='') as f:
+                fieldnames = next(csv.reader(f))
+            self.writer = csv.DictWriter(self.f, fieldnames,
+                                         extrasaction='ignore')
+
+    def write(self, row):
+        if self.csv:
+            if self.writer is None:
+                self.writer = csv.DictWriter(self.f, list(row),
+                                             extrasaction='ignore')
+                self.writer.writeheader()
+            self.writer.writerow(row)
+        else:
+            self.f.write(json.dumps(row) + '\n')
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+def sweep(points, out_path, n_jobs=None):
+    done = load_done(out_path)
+    todo = [p for p in points if point_key(p) not in done]
+    print(f'{len(done)} puntos ya calculados, {len(todo)} pendientes')
+    if not todo:
+        return
+    writer = ResultWriter(out_path)
+    try:
+        with multiprocessing.Pool(n_jobs or os.cpu_count()) as pool:
+            for i, row in enumerate(pool.imap(run_point, todo), 1):
+                writer.write(row)
+                print(f'[{i}/{len(todo)}] ' +
+                      ' '.join(f'{f}={row[f]}' for f in KEY_FIELDS))
+    finally:
+        writer.close()
+
+if __name__ == '__main__':
+    desc = 'Barrido de parámetros de simulaciones de protocolos en paralelo.'
+    parser = argparse.ArgumentParser(description=desc)
+    parser.add_argument('-p', nargs='+', default=['goBackN'],
+                        dest='protocols',
+                        help=('módulos de protocolo (con EntityA y EntityB)'
+                              ' [por defecto: %(default)s]'))
+    parser.add_argument('-n', type=int, nargs='+', default=[1000],
+                        dest='num_msgs',
+                        help=('número de mensajes a simular'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-d', type=float, nargs='+', default=[100.0],
+                        dest='interarrival_time',
+                        help=('tiempos promedio entre mensajes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-z', type=int, nargs='+', default=[16],
+                        dest='seqnum_limit',
+                        help=('límites de seqnum'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-l', type=float, nargs='+', default=[0.0],
+                        dest='loss_prob',
+                        help=('probabilidades de pérdida de paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-c', type=float, nargs='+', default=[0.0],
+                        dest='corrupt_prob',
+                        help=('probabilidades de corrupción de paquetes'
+                              ' [float, por defecto: %(default)s]'))
+    parser.add_argument('-s', type=int, nargs='+', default=[1],
+                        dest='random_seed',
+                        help=('semillas para el generador de números aleatorios'
+                              ' [int, por defecto: %(default)s]'))
+    parser.add_argument('-j', type=int, default=None,
+                        dest='n_jobs',
+                        help=('número de procesos'
+                              ' [int, por defecto: todos los núcleos]'))
+    parser.add_argument('-o', default='sweep.csv',
+                        dest='output',
+                        help=('fichero de resultados, .csv o .jsonl'
+                              ' [por defecto: %(default)s]'))
+    options = parser.parse_args()
+
+    points = make_grid(options.protocols, options.num_msgs,
+                       options.interarrival_time, options.seqnum_limit,
+                       options.loss_prob, options.corrupt_prob,
+                       options.random_seed)
+    sweep(list(points), options.output, options.n_jobs)
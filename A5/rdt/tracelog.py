@@ -0,0 +1,116 @@
+import json
+import os
+import struct
+
+# Structured event traces.  A binary trace is the MAGIC header followed by
+# fixed-size little-endian records:
+#
+#   time (float64), kind (uint8), entity (uint8, 0=A 1=B), flags (uint8),
+#   flow (uint8), seqnum (int32), acknum (int32)
+#
+# seqnum and acknum are -1 for records without a packet.  flow is the index
+# of the sender/receiver pair modulo 256; traces written before it existed
+# have a zero padding byte there, so they read as flow 0.  A trace whose file
+# name ends in .jsonl is written as one JSON object per record instead.
+
+MAGIC = b'RDTLOG1\n'
+RECORD = struct.Struct('<dBBBBii')
+BUFFER_SIZE = 1 << 20
+
+# Record kinds.  The first three match the simulator's EventType events.
+FROM_LAYER5 = 0
+FROM_LAYER3 = 1
+TIMER_INTERRUPT = 2
+TO_LAYER3 = 3
+TO_LAYER5 = 4
+START_TIMER = 5
+STOP_TIMER = 6
+KIND_NAMES = ('from_layer5', 'from_layer3', 'timer_interrupt',
+              'to_layer3', 'to_layer5', 'start_timer', 'stop_timer')
+
+# Flag bits of TO_LAYER3 records.
+LOST = 1
+CORRUPT = 2
+
+ENTITY_NAMES = ('A', 'B')
+
+class BinaryTraceSink:
+    def __init__(self, path, offset=None):
+        if offset is None:
+            self.f = open(path, 'wb', buffering=BUFFER_SIZE)
+            self.f.write(MAGIC)
+        else:
+            self.f = _reopen(path, offset)
+        self.pack = RECORD.pack
+
+    def tell(self):
+        self.f.flush()
+        return self.f.tell()
+
+    def write(self, time, kind, entity, seqnum=-1, acknum=-1, flags=0, flow=0):
+        self.f.write(self.pack(time, kind, entity, flags, flow, seqnum, acknum))
+
+    def close(self):
+        self.f.close()
+
+class JsonlTraceSink:
+    def __init__(self, path, offset=None):
+        # Written in binary, so tell() gives byte offsets.
+        if offset is None:
+            self.f = open(path, 'wb', buffering=BUFFER_SIZE)
+        else:
+            self.f = _reopen(path, offset)
+
+    def tell(self):
+        self.f.flush()
+        return self.f.tell()
+
+    def write(self, time, kind, entity, seqnum=-1, acknum=-1, flags=0, flow=0):
+        record = {'time'   : time,
+                  'kind'   : KIND_NAMES[kind],
+                  'entity' : ENTITY_NAMES[entity],
+                  'flow'   : flow,
+                  'seqnum' : seqnum,
+                  'acknum' : acknum,
+                  'lost'   : bool(flags & LOST),
+                  'corrupt': bool(flags & CORRUPT)}
+        self.f.write((json.dumps(record) + '\n').encode())
+
+    def close(self):
+        self.f.close()
+
+def _reopen(path, offset):
+    # Continue a trace from `offset`, dropping anything after it.
+    f = open(path, 'r+b', buffering=BUFFER_SIZE)
+    f.truncate(offset)
+    f.seek(offset)
+    return f
+
+def open_trace_sink(path, offset=None):
+    # With an offset, the trace of a resumed run continues the file from
+    # there.
+    if os.path.splitext(path)[1].lower() == '.jsonl':
+        return JsonlTraceSink(path, offset)
+    return BinaryTraceSink(path, offset)
+
+def read_records(path):
+    # Yields (time, kind, entity, flags, flow, seqnum, acknum) for every
+    # record of a trace written by either sink.
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            while True:
+                chunk = f.read(RECORD.size * 4096)
+                if not chunk:
+                    break
+                n = len(chunk) - len(chunk) % RECORD.size
+                yield from RECORD.iter_unpack(chunk[:n])
+                if n != len(chunk):
+                    break       # Truncated last record.
+            return
+    with open(path) as f:
+        for line in f:
+            r = json.loads(line)
+            flags = (LOST if r['lost'] else 0) | (CORRUPT if r['corrupt'] else 0)
+            yield (r['time'], KIND_NAMES.index(r['kind']),
+                   ENTITY_NAMES.index(r['entity']), flags, r.get('flow', 0),
+                   r['seqnum'], r['acknum'])
@@ -0,0 +1,171 @@
+from collections import deque
+import sys
+
+from rdt import (Msg, Pkt, Simulator, make_arg_parser,
+                 pkt_insert_checksum, pkt_is_corrupt,
+                 report_config, report_results, make_rtt_estimator,
+                 get_time, start_timer, stop_timer, to_layer3, to_layer5)
+
+# The simulator gives each entity a single timer, so the per-packet timers
+# are deadlines kept by A, with the real timer set for the earliest one.
+# Timer events may fire a rounding error before the deadline they were set
+# for, hence the tolerance.
+TIME_EPSILON = 1e-9
+
+class EntityA:
+
+    def __init__(self, seqnum_limit):
+        # How long to wait for the ack of each packet?
+        self.WAIT_TIME = 10.0 + 4.0 * seqnum_limit//2
+        # Retransmission timeout (--rto); like goBackN.py, the fixed one
+        # backs off linearly.
+        self.rtt = make_rtt_estimator(self, self.WAIT_TIME, linear_backoff=True)
+
+        # Configuration.
+        self.seqnum_limit = seqnum_limit
+        self.window_size = seqnum_limit//2
+
+        # State.
+        self.base = 0
+        self.n_in_window = 0
+        self.pkts = [None] * seqnum_limit
+        self.acked = [False] * seqnum_limit
+        self.deadlines = [0.0] * seqnum_limit
+        self.send_times = [0.0] * seqnum_limit
+        self.resent = [False] * seqnum_limit
+        self.layer5_msgs = deque()
+        self.timer_running = False
+
+    def output(self, message):
+        self.layer5_msgs.append(message)
+        self.maybe_output_from_queue()
+
+    def maybe_output_from_queue(self):
+        while (self.layer5_msgs
+               and self.n_in_window < self.window_size):
+            m = self.layer5_msgs.popleft()
+            s = (self.base + self.n_in_window) % self.seqnum_limit
+            p = Pkt(s, 0, 0, m.data)
+            pkt_insert_checksum(self, p)
+            self.pkts[s] = p
+            self.acked[s] = False
+            self.send_times[s] = get_time(self)
+            self.resent[s] = False
+            self.deadlines[s] = self.send_times[s] + self.rtt.rto
+            self.n_in_window += 1
+            to_layer3(self, p)
+            if not self.timer_running:
+                start_timer(self, self.rtt.rto)
+                self.timer_running = True
+
+    def in_window(self, seqnum):
+        return (seqnum - self.base) % self.seqnum_limit < self.n_in_window
+
+    def input(self, packet):
+        if (pkt_is_corrupt(self, packet)
+            or not self.in_window(packet.acknum)):
+            return
+
+        if not self.acked[packet.acknum]:
+            self.acked[packet.acknum] = True
+            self.rtt.on_ack(get_time(self) - self.send_times[packet.acknum]
+                            if not self.resent[packet.acknum] else None)
+
+        # Slide the window past the acked packets at its start.
+        base = self.base
+        while (self.n_in_window > 0
+               and self.acked[self.base]):
+            self.pkts[self.base] = None
+            self.base = (self.base + 1) % self.seqnum_limit
+            self.n_in_window -= 1
+        if self.base != base:
+            # goBackN.py restarts its timer whenever the window slides; do
+            # the same here, so a slow channel is not taken for a lossy one.
+            now = get_time(self)
+            wait_time = self.rtt.rto
+            for i in range(self.n_in_window):
+                s = (self.base + i) % self.seqnum_limit
+                if self.deadlines[s] < now + wait_time:
+                    self.deadlines[s] = now + wait_time
+        if (self.n_in_window == 0
+            and self.timer_running):
+            stop_timer(self)
+            self.timer_running = False
+        self.maybe_output_from_queue()
+
+    def timer_interrupt(self):
+        self.timer_running = False
+        now = get_time(self)
+        wait_time = None
+        next_deadline = None
+        for i in range(self.n_in_window):
+            s = (self.base + i) % self.seqnum_limit
+            if self.acked[s]:
+                continue
+            if self.deadlines[s] <= now + TIME_EPSILON:
+                # Only the packets whose own timer expired are resent.
+                # Like goBackN.py, back off while no new acks come in.
+                # A wake-up with no expired packet (the deadlines moved
+                # on since the timer was set) is not a timeout.
+                if wait_time is None:
+                    wait_time = self.rtt.on_timeout()
+                to_layer3(self, self.pkts[s])
+                self.resent[s] = True
+                self.deadlines[s] = now + wait_time
+            if (next_deadline is None
+                or self.deadlines[s] < next_deadline):
+                next_deadline = self.deadlines[s]
+        if next_deadline is not None:
+            start_timer(self, max(0.0, next_deadline - now))
+            self.timer_running = True
+
+class EntityB:
+    def __init__(self, seqnum_limit):
+        # Configuration.
+        self.seqnum_limit = seqnum_limit
+        self.window_size = seqnum_limit//2
+
+        # State.
+        self.rcv_base = 0
+        self.buffer = [None] * seqnum_limit
+
+    def input(self, packet):
+        if pkt_is_corrupt(self, packet):
+            return
+
+        offset = (packet.seqnum - self.rcv_base) % self.seqnum_limit
+        if offset < self.window_size:
+            # Within the receive window: buffer it and deliver everything
+            # that is now in order.
+            if self.buffer[packet.seqnum] is None:
+                self.buffer[packet.seqnum] = packet.payload
+            while self.buffer[self.rcv_base] is not None:
+                to_layer5(self, Msg(self.buffer[self.rcv_base]))
+                self.buffer[self.rcv_base] = None
+                self.rcv_base = (self.rcv_base + 1) % self.seqnum_limit
+        elif offset < self.seqnum_limit - self.window_size:
+            # Neither in this window nor in the previous one.
+            return
+
+        # Ack the packet, even if it was delivered before: its ack may
+        # have been lost.
+        p = Pkt(0, packet.seqnum, 0, packet.payload)
+        pkt_insert_checksum(self, p)
+        to_layer3(self, p)
+
+    def timer_interrupt(self):
+        pass
+
+def main(options, cb_A=None, cb_B=None):
+    sim = Simulator(options, EntityA, EntityB, cb_A, cb_B)
+    report_config(sim)
+    sim.run()
+    return sim
+
+if __name__ == '__main__':
+    parser = make_arg_parser()
+    options = parser.parse_args()
+
+    sim = main(options)
+    report_results(sim)
+    sys.exit(0)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The protocols are scripts in A5/, imported as top-level modules, and the
+# engine is the rdt package next to them.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
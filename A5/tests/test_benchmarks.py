@@ -0,0 +1,46 @@
+import pytest
+
+from rdt import Simulator, default_options
+
+import alternatingBitProtocol
+import goBackN
+import selectiveRepeat
+
+# Wall time and events per second of fixed-seed runs, with pytest-benchmark.
+# Save a baseline and compare later runs against it, e.g. from A5/:
+#
+#   python -m pytest tests/test_benchmarks.py --benchmark-autosave
+#   python -m pytest tests/test_benchmarks.py --benchmark-compare \
+#       --benchmark-compare-fail=min:10%
+#
+# The second command fails if any case got more than 10% slower.  Events
+# per second are in each case's extra_info (--benchmark-json).
+
+pytest.importorskip('pytest_benchmark')
+
+CASES = [
+    pytest.param(goBackN, {}, id='goBackN'),
+    pytest.param(goBackN, {'cc': 'aimd'}, id='goBackN-cc'),
+    pytest.param(goBackN, {'bandwidth': 50.0}, id='goBackN-link'),
+    pytest.param(selectiveRepeat, {}, id='selectiveRepeat'),
+    pytest.param(alternatingBitProtocol, {}, id='alternatingBitProtocol'),
+]
+
+def make_run(module, overrides):
+    options = default_options(num_msgs=20000, interarrival_time=5.0,
+                              seqnum_limit=16, loss_prob=0.1,
+                              corrupt_prob=0.1, random_seed=1, **overrides)
+    def run():
+        sim = Simulator(options, module.EntityA, module.EntityB)
+        sim.run()
+        return sim
+    return run
+
+@pytest.mark.parametrize('module, overrides', CASES)
+def test_simulation_speed(benchmark, module, overrides):
+    sim = benchmark.pedantic(make_run(module, overrides), rounds=3,
+                             iterations=1, warmup_rounds=1)
+    benchmark.extra_info['n_events'] = sim.n_events
+    benchmark.extra_info['events_per_second'] = (sim.n_events
+                                                 / benchmark.stats.stats.min)
+    assert sim.n_sim == sim.n_sim_max
@@ -0,0 +1,21 @@
+from rdt import Simulator, default_options, run_protocol
+from rdt.packet import internet_checksum
+
+import goBackN
+
+OPTIONS = default_options(num_msgs=1000, interarrival_time=20.0,
+                          loss_prob=0.1, corrupt_prob=0.2, random_seed=1)
+
+def test_simulators_keep_their_own_checksum():
+    # Building a simulator with another checksum in the middle of a run
+    # leaves the running one alone.
+    delivered = []
+    others = []
+    def at_B(data):
+        delivered.append(data)
+        if len(delivered) == 100:
+            others.append(Simulator(default_options(checksum='internet'),
+                                    goBackN.EntityA, goBackN.EntityB))
+    assert (run_protocol(goBackN, OPTIONS, cbB=at_B).get_stats()
+            == run_protocol(goBackN, OPTIONS).get_stats())
+    assert others[0].checksum is internet_checksum
@@ -0,0 +1,33 @@
+import argparse
+
+import pytest
+
+from rdt import make_arg_parser, run_protocol
+
+import goBackN
+
+def test_run_protocol_takes_a_benchmark_namespace():
+    # A benchmark's parser: the simulator's options plus its own, with -z
+    # replaced by a list.
+    parser = argparse.ArgumentParser(parents=[make_arg_parser(add_help=False)],
+                                     conflict_handler='resolve')
+    parser.set_defaults(num_msgs=200, interarrival_time=20.0, random_seed=1)
+    parser.add_argument('-z', type=int, nargs='+', default=[4, 16],
+                        dest='seqnum_limits')
+    options = parser.parse_args(['-l', '0.1'])
+    for seqnum_limit in options.seqnum_limits:
+        stats = run_protocol(goBackN, options, seqnum_limit=seqnum_limit).get_stats()
+        assert stats['seqnum_limit'] == seqnum_limit
+        assert stats['loss_prob'] == 0.1
+        assert stats['n_sim'] == 200
+        assert stats['throughput'] == stats['n_to_layer5_B'] / stats['time']
+        assert stats['bytes_throughput'] == (stats['n_bytes_to_layer5_B']
+                                             / stats['time'])
+
+def test_message_size_must_be_positive():
+    with pytest.raises(ValueError):
+        run_protocol(goBackN, msg_size=0)
+
+def test_there_must_be_a_flow():
+    with pytest.raises(ValueError):
+        run_protocol(goBackN, n_flows=0)
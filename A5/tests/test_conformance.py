@@ -0,0 +1,121 @@
+import pytest
+
+from rdt import default_options
+
+import alternatingBitProtocol
+import goBackN
+import rdtsim
+import selectiveRepeat
+
+# Every protocol must deliver at B, through the to_layer5 callback, the
+# messages handed to A in order and exactly once, whatever the channel
+# does.  The simulator's message k is bytes([97 + k % 26]) * msg_size, so
+# any duplicate, loss or reordering shows up as a mismatch, except for a
+# run of exactly 26 messages duplicated or skipped as a whole.  A run
+# stops when the last message is handed to A, so what B got must be a
+# prefix of what A was given.
+
+PROTOCOLS = [
+    pytest.param(goBackN.main, id='goBackN'),
+    pytest.param(selectiveRepeat.main, id='selectiveRepeat'),
+    pytest.param(alternatingBitProtocol.principal, id='alternatingBitProtocol'),
+]
+
+LOSS_PROBS = [0.0, 0.1, 0.3]
+CORRUPT_PROBS = [0.0, 0.1, 0.3]
+SEEDS = [1, 2]
+NUM_MSGS = 300
+
+def expected_message(k, msg_size):
+    return bytes([97 + k % 26]) * msg_size
+
+def run(main, **overrides):
+    overrides.setdefault('num_msgs', NUM_MSGS)
+    options = default_options(**overrides)
+    at_A = []
+    at_B = []
+    sim = main(options, at_A.append, at_B.append)
+    return sim, at_A, at_B
+
+def check_delivery(sim, at_A, at_B):
+    msg_size = sim.msg_size
+    assert at_A == []
+    assert len(at_B) <= sim.n_sim
+    for k, data in enumerate(at_B):
+        assert data == expected_message(k, msg_size), f'message {k}'
+    assert sim.n_to_layer5_B == len(at_B)
+
+@pytest.mark.parametrize('main', PROTOCOLS)
+@pytest.mark.parametrize('loss_prob', LOSS_PROBS)
+@pytest.mark.parametrize('corrupt_prob', CORRUPT_PROBS)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_in_order_exactly_once(main, loss_prob, corrupt_prob, seed):
+    sim, at_A, at_B = run(main, loss_prob=loss_prob,
+                          corrupt_prob=corrupt_prob, random_seed=seed)
+    check_delivery(sim, at_A, at_B)
+    # Some progress, even over the worst channel.
+    assert len(at_B) > 0
+
+@pytest.mark.parametrize('main', PROTOCOLS)
+def test_perfect_channel_delivers_everything_sent(main):
+    # With no loss or corruption, only the packets still in flight when
+    # the run stops are missing.
+    sim, at_A, at_B = run(main, interarrival_time=50.0, random_seed=3)
+    check_delivery(sim, at_A, at_B)
+    assert len(at_B) >= sim.n_sim - sim.seqnum_limit
+
+# Protocol options that change how packets are sent, acked or timed.
+VARIANTS = [
+    pytest.param(goBackN.main, {'cc': 'aimd'}, id='goBackN-cc'),
+    pytest.param(goBackN.main, {'batch': True, 'mtu': 100,
+                                'interarrival_time': 5.0}, id='goBackN-batch'),
+    pytest.param(goBackN.main, {'ack_every': 3}, id='goBackN-ack-every'),
+    pytest.param(goBackN.main, {'rto': 'adaptive'}, id='goBackN-rto'),
+    pytest.param(goBackN.main, {'bandwidth': 20.0, 'queue_limit': 4,
+                                'interarrival_time': 2.0}, id='goBackN-link'),
+    pytest.param(goBackN.main, {'loss_model': 'gilbert', 'ge_corrupt_bad': 0.5},
+                 id='goBackN-gilbert'),
+    pytest.param(goBackN.main, {'checksum': 'internet'}, id='goBackN-internet'),
+    pytest.param(goBackN.main, {'seqnum_limit': 4}, id='goBackN-z4'),
+    pytest.param(selectiveRepeat.main, {'rto': 'adaptive'},
+                 id='selectiveRepeat-rto'),
+    pytest.param(selectiveRepeat.main, {'seqnum_limit': 4},
+                 id='selectiveRepeat-z4'),
+    pytest.param(alternatingBitProtocol.principal, {'rto': 'adaptive'},
+                 id='alternatingBitProtocol-rto'),
+]
+
+@pytest.mark.parametrize('main, overrides', VARIANTS)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_variants_in_order_exactly_once(main, overrides, seed):
+    sim, at_A, at_B = run(main, loss_prob=0.2, corrupt_prob=0.2,
+                          random_seed=seed, **overrides)
+    check_delivery(sim, at_A, at_B)
+    assert len(at_B) > 0
+
+def test_packets_arriving_at_the_same_time():
+    # On a link this fast, packets sent back to back arrive at the same
+    # time.
+    sim, at_A, at_B = run(goBackN.main, loss_prob=0.2, interarrival_time=1.0,
+                          bandwidth=1e20, random_seed=1)
+    check_delivery(sim, at_A, at_B)
+
+@pytest.mark.parametrize('main', PROTOCOLS)
+def test_seeded_runs_repeat(main):
+    first = run(main, loss_prob=0.2, corrupt_prob=0.2, random_seed=7)[0]
+    second = run(main, loss_prob=0.2, corrupt_prob=0.2, random_seed=7)[0]
+    assert first.get_stats() == second.get_stats()
+
+# rdtsim.py is the unfinished skeleton and is left out of the runs above;
+# its known defects are checked instead, so fixing one shows up here.
+
+def test_rdtsim_known_defects():
+    # A never wraps its seqnums around, and resends packets that were
+    # acked.  Once B's expected seqnum wraps around it takes them again,
+    # so even a perfect channel gets duplicates.
+    sim, at_A, at_B = run(rdtsim.main, interarrival_time=50.0, random_seed=3)
+    assert len(at_B) > sim.n_sim
+    assert sim.get_stats()['n_spurious_A'] > 0
+    # There are no checksums, so B delivers corrupted payloads.
+    sim, at_A, at_B = run(rdtsim.main, corrupt_prob=0.3, random_seed=1)
+    assert any(data.startswith(b'Z') for data in at_B)
@@ -0,0 +1,14 @@
+from rdt import Pkt
+from rdt.metrics import Metrics
+
+def test_retransmission_is_spurious_only_once_B_accepted_a_copy():
+    m = Metrics(100.0)
+    p = Pkt(0, 0, 0, b'a')
+    m.packet_sent(1.0, p)
+    m.packet_sent(2.0, p)       # Lost, corrupted or discarded by B.
+    m.packet_accepted(0)
+    m.packet_sent(3.0, p)       # B has it; only the ACK was lost.
+    q = Pkt(0, 0, 0, b'b')      # The seqnum wrapped around.
+    m.packet_sent(4.0, q)
+    m.packet_sent(5.0, q)
+    assert (m.n_retransmit, m.n_spurious) == (3, 1)
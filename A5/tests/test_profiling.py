@@ -0,0 +1,37 @@
+import pytest
+
+from rdt import default_options, run_protocol
+
+import goBackN
+import selectiveRepeat
+
+# Tracing and profiling wrap the plain event loop, so they must not change
+# what a run does.
+
+OPTIONS = default_options(num_msgs=500, interarrival_time=5.0,
+                          loss_prob=0.2, corrupt_prob=0.2, random_seed=1)
+
+@pytest.mark.parametrize('module', [goBackN, selectiveRepeat])
+def test_profiled_run_matches_plain_run(tmp_path, module):
+    path = tmp_path / 'profile.txt'
+    profiled = run_protocol(module, OPTIONS, profile_file=str(path))
+    assert type(profiled).__name__ == 'ProfilingSimulator'
+    assert profiled.get_stats() == run_protocol(module, OPTIONS).get_stats()
+
+    # Collapsed stacks: "frame;frame;frame value", value in microseconds.
+    lines = path.read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, value = line.rsplit(' ', 1)
+        frames = stack.split(';')
+        assert frames[0] == 'run'
+        assert all(frames)
+        assert int(value) > 0
+    stacks = {line.rsplit(' ', 1)[0] for line in lines}
+    assert 'run;from_layer3;EntityB.input' in stacks
+
+def test_traced_run_matches_plain_run(tmp_path):
+    traced = run_protocol(goBackN, OPTIONS,
+                          trace_file=str(tmp_path / 'trace.bin'))
+    assert type(traced).__name__ == 'TracingSimulator'
+    assert traced.get_stats() == run_protocol(goBackN, OPTIONS).get_stats()
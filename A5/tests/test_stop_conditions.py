@@ -0,0 +1,41 @@
+import pytest
+
+from rdt import default_options, run_protocol
+
+import goBackN
+
+OPTIONS = default_options(interarrival_time=20.0, loss_prob=0.1, random_seed=1)
+
+def test_until_time():
+    sim = run_protocol(goBackN, OPTIONS, num_msgs=0, until_time=20000.0)
+    stats = sim.get_stats()
+    assert stats['time'] == 20000.0
+    assert stats['stop_reason'] == 'until_time'
+    assert stats['n_batches'] == 20
+
+def test_num_msgs_still_limits():
+    sim = run_protocol(goBackN, OPTIONS, num_msgs=100, until_time=1e9)
+    assert sim.get_stats()['stop_reason'] == 'num_msgs'
+    assert sim.n_sim == 100
+
+def test_unlimited_run_needs_a_stop_condition():
+    with pytest.raises(ValueError):
+        run_protocol(goBackN, OPTIONS, num_msgs=0)
+
+def test_warmup_is_excluded():
+    stats = run_protocol(goBackN, OPTIONS, num_msgs=0, until_time=20000.0,
+                         warmup=5000.0).get_stats()
+    assert stats['steady_time'] == 15000.0
+    assert stats['n_batches'] == 15
+    assert stats['steady_n_retransmit_A'] < stats['n_retransmit_A']
+    # Batches cover the whole measured time, so their mean is the steady
+    # throughput.
+    assert stats['throughput_ci'][0] == pytest.approx(stats['steady_throughput'])
+
+def test_ci_width_stops_once_good_enough():
+    stats = run_protocol(goBackN, OPTIONS, num_msgs=0, ci_width=0.05,
+                         batch_time=500.0).get_stats()
+    assert stats['stop_reason'] == 'ci_width'
+    mean, half_width = stats['throughput_ci']
+    assert half_width <= 0.05 * mean
+    assert stats['n_batches'] >= 10
@@ -0,0 +1,23 @@
+import pytest
+
+from rdt import sweep
+
+def points():
+    return list(sweep.make_grid(['goBackN'], [200], [100.0], [16],
+                                [0.0, 0.1], [0.0], [1, 2]))
+
+@pytest.mark.parametrize('ext', ['csv', 'jsonl'])
+def test_resume_after_truncated_row(tmp_path, ext):
+    full = tmp_path / f'full.{ext}'
+    cut = tmp_path / f'cut.{ext}'
+    sweep.sweep(points(), str(full), n_jobs=1)
+    data = full.read_bytes()
+    # Killed while writing the last row, in its stats columns.
+    cut.write_bytes(data[:-40])
+    assert len(sweep.load_done(str(cut))) == len(points()) - 1
+    sweep.sweep(points(), str(cut), n_jobs=1)
+    assert sweep.load_done(str(cut)) == sweep.load_done(str(full))
+    assert sorted(cut.read_bytes().splitlines()) == sorted(data.splitlines())
+    # A second resume finds nothing to do and leaves the file alone.
+    sweep.sweep(points(), str(cut), n_jobs=1)
+    assert sorted(cut.read_bytes().splitlines()) == sorted(data.splitlines())